@@ -0,0 +1,98 @@
+# benchmarks/bench_parse_loop.py
+"""
+Замер блокировки event loop при парсинге больших RSS-фидов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_parse_loop --feeds 3 --items 2000
+
+Сравниваются три режима:
+    inline  — feedparser.parse прямо в event loop (как было раньше)
+    thread  — пул потоков services.parse_pool
+    process — пул процессов services.parse_pool
+"""
+import argparse
+import asyncio
+import time
+import feedparser
+from services import parse_pool
+
+HEARTBEAT_MS = 1
+
+
+def make_feed(n_items, desc_len=1500):
+    """Генерирует синтетический RSS-фид из n_items записей."""
+    description = ("Очень длинное описание новости. " * (desc_len // 32 + 1))[:desc_len]
+    items = "".join(
+        f"<item><title>Новость {i}</title>"
+        f"<link>https://example.com/news/{i}</link>"
+        f"<pubDate>Thu, 16 Oct 2025 12:{i % 60:02d}:00 +0300</pubDate>"
+        f"<description><![CDATA[<p>{description}</p>]]></description></item>"
+        for i in range(n_items)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>Synthetic</title><link>https://example.com</link>{items}</channel></rss>"
+    ).encode("utf-8")
+
+
+async def heartbeat(stop, gaps):
+    """Тикает каждые HEARTBEAT_MS и записывает фактическую задержку тика."""
+    expected = HEARTBEAT_MS / 1000
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(expected)
+        now = time.perf_counter()
+        gaps.append((now - last - expected) * 1000)
+        last = now
+
+
+async def parse_inline(body, source):
+    parsed = feedparser.parse(body)
+    return parsed.entries[:parse_pool.MAX_ENTRIES]
+
+
+async def run_mode(mode, bodies):
+    if mode != "inline":
+        parse_pool.shutdown_parse_pool()
+        parse_pool.PARSE_EXECUTOR = mode
+    parse = parse_inline if mode == "inline" else parse_pool.parse_feed
+
+    # Прогрев пула, чтобы не мерить старт процессов
+    if mode != "inline":
+        await parse(bodies[0][:2000] + b"</channel></rss>", "warmup")
+
+    stop = asyncio.Event()
+    gaps = []
+    beat = asyncio.create_task(heartbeat(stop, gaps))
+    started = time.perf_counter()
+    await asyncio.gather(*(parse(body, f"feed-{i}") for i, body in enumerate(bodies)))
+    elapsed = (time.perf_counter() - started) * 1000
+    stop.set()
+    await beat
+
+    gaps.sort()
+    p99 = gaps[int(len(gaps) * 0.99)] if gaps else 0.0
+    print(
+        f"{mode:<8} total={elapsed:8.0f} ms  max_block={max(gaps, default=0):8.1f} ms  "
+        f"p99_block={p99:7.1f} ms  blocked_sum={sum(g for g in gaps if g > 5):8.0f} ms"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeds", type=int, default=3, help="количество фидов")
+    parser.add_argument("--items", type=int, default=2000, help="записей в каждом фиде")
+    parser.add_argument("--modes", default="inline,thread,process")
+    args = parser.parse_args()
+
+    bodies = [make_feed(args.items) for _ in range(args.feeds)]
+    size_mb = sum(len(b) for b in bodies) / 1024 / 1024
+    print(f"Фидов: {args.feeds}, записей в каждом: {args.items}, всего {size_mb:.1f} МБ")
+
+    for mode in args.modes.split(","):
+        await run_mode(mode.strip(), bodies)
+    parse_pool.shutdown_parse_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
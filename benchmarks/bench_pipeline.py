@@ -0,0 +1,242 @@
+# benchmarks/bench_pipeline.py
+"""
+Офлайн-бенчмарк конвейера целиком: RSS, GigaChat и Telegram заменены локальными заглушками
+(benchmarks/fakes.py), поэтому прогон не зависит от сети и внешних лимитов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.bench_pipeline --feeds 10 --items 50 --rounds 20
+    python -m benchmarks.bench_pipeline --scenarios tick --ticks 5 --llm-latency 1.0
+
+Сценарии:
+    rss     — get_all_rss_news по заглушке фидов (условные GET, парсинг, кэш валидаторов)
+    latest  — обработчик /latest через Dispatcher.feed_update, ответы уходят в заглушку Bot API
+    tick    — scheduled_job + publish_job: приём, запись в БД, LLM и публикация. Нужна отдельная ТЕСТОВАЯ база
+              (POSTGRES_* в окружении): бенчмарк пишет в неё фиды, новости и очередь публикации.
+              Если база недоступна, сценарий пропускается.
+
+Для каждого сценария печатаются пропускная способность, p50/p99 задержки операции
+и блокировка event loop (максимальная и суммарная задержка тиков heartbeat).
+"""
+import os
+import sys
+import time
+import argparse
+import asyncio
+import tempfile
+
+# Окружение для импорта модулей бота; реальные значения из .env не нужны
+os.environ.setdefault("TOKEN", "123456:bench")
+os.environ.setdefault("CHAT_ID", "1000")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_PASSWORD", "postgres")
+os.environ.setdefault("POSTGRES_DB", "gamecom_bench")
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_PORT", "5432")
+os.environ.setdefault("RSS_CACHE_FILE", os.path.join(tempfile.mkdtemp(prefix="bench-rss-"), "validators.json"))
+os.environ.setdefault("METRICS_PORT", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="bench-logs-"))
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Update
+
+from benchmarks.bench_parse_loop import heartbeat
+from benchmarks.fakes import FakeRssServer, FakeGigaChatServer, FakeTelegramServer
+from services import rate_limiter
+from services.feed_registry import feed_registry
+from services.gigachat import gigachat_client
+from services.http_client import close_http_session
+from services.latest_cache import latest_cache
+from services.metrics import render_metrics
+from services.parse_pool import shutdown_parse_pool
+from services.rss_reader import get_all_rss_news
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+class LoopMonitor:
+    """Heartbeat на время сценария: сколько event loop был занят синхронной работой."""
+
+    async def __aenter__(self):
+        self.stop = asyncio.Event()
+        self.gaps = []
+        self.task = asyncio.create_task(heartbeat(self.stop, self.gaps))
+        return self
+
+    async def __aexit__(self, *exc):
+        self.stop.set()
+        await self.task
+
+    def summary(self):
+        return (
+            f"max_block={max(self.gaps, default=0):7.1f} ms  "
+            f"blocked_sum={sum(g for g in self.gaps if g > 5):7.0f} ms"
+        )
+
+
+def report(name, ops, unit, elapsed, latencies, monitor):
+    print(
+        f"{name:<7} {ops:6d} {unit:<6} за {elapsed:7.2f} с  "
+        f"{ops / elapsed if elapsed else 0:8.1f} {unit}/с  "
+        f"p50={percentile(latencies, 0.5) * 1000:8.1f} ms  p99={percentile(latencies, 0.99) * 1000:8.1f} ms  "
+        f"{monitor.summary()}"
+    )
+
+
+# === Сценарии ===
+async def bench_rss(args, rss):
+    latencies = []
+    items_total = 0
+    async with LoopMonitor() as monitor:
+        started = time.perf_counter()
+        for _ in range(args.rounds):
+            call_started = time.perf_counter()
+            items = await get_all_rss_news(rss.feed_urls())
+            latencies.append(time.perf_counter() - call_started)
+            items_total += len(items)
+        elapsed = time.perf_counter() - started
+    report("rss", args.rounds, "циклов", elapsed, latencies, monitor)
+    print(f"        записей отдано: {items_total}, ответов 304: {rss.not_modified} из {rss.requests}")
+
+
+def latest_update(update_id, user_id):
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Bench"},
+            "text": "/latest",
+            "entities": [{"type": "bot_command", "offset": 0, "length": 7}],
+        },
+    })
+
+
+async def bench_latest(args, bot, telegram):
+    from handlers.latest import news_router
+
+    dp = Dispatcher()
+    dp.include_router(news_router)
+
+    async def one(update_id):
+        call_started = time.perf_counter()
+        await dp.feed_update(bot, latest_update(update_id, 10_000 + update_id))
+        return time.perf_counter() - call_started
+
+    sent_before = len(telegram.sent)
+    async with LoopMonitor() as monitor:
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(1, args.commands + 1)))
+        elapsed = time.perf_counter() - started
+    report("latest", args.commands, "команд", elapsed, latencies, monitor)
+    print(f"        ответов в Telegram: {len(telegram.sent) - sent_before}")
+
+
+async def bench_tick(args, rss, gigachat, bot, telegram):
+    from sqlalchemy import text
+    from database.db import engine, init_db
+    from services import scheduler, sender
+    from services.feed_poller import feed_poller
+
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        print(f"tick    пропущен: тестовая БД недоступна ({e.__class__.__name__}: {e})")
+        return
+    await init_db()
+
+    sender.set_bot(bot)
+    sender.PUBLISH_TARGETS = [(args.chat_id, None)]
+    sender.RETRY_DELAY = 0
+
+    latencies = []
+    sent_before = len(telegram.sent)
+    llm_before = gigachat.requests
+    async with LoopMonitor() as monitor:
+        started = time.perf_counter()
+        for _ in range(args.ticks):
+            # Каждый тик опрашивает все фиды, адаптивные интервалы здесь не нужны
+            for url in rss.feed_urls():
+                feed_poller._state(url, 0).next_poll_at = 0
+            call_started = time.perf_counter()
+            await scheduler.scheduled_job()
+            await scheduler.publish_job()
+            latencies.append(time.perf_counter() - call_started)
+        elapsed = time.perf_counter() - started
+    sent = len(telegram.sent) - sent_before
+    report("tick", args.ticks, "тиков", elapsed, latencies, monitor)
+    print(
+        f"        опубликовано {sent} ({sent / elapsed if elapsed else 0:.2f}/с), "
+        f"запросов к LLM {gigachat.requests - llm_before} ({gigachat.prompt_bytes / 1024:.0f} КБ промптов), "
+        f"ошибок LLM {gigachat.errors}, оборвано заглушек {gigachat.aborted_streams}, "
+        f"flood wait {telegram.flood_responses}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="rss,latest,tick")
+    parser.add_argument("--feeds", type=int, default=10, help="количество фидов")
+    parser.add_argument("--items", type=int, default=50, help="записей в каждом фиде")
+    parser.add_argument("--change-rate", type=float, default=0.3, help="вероятность новых записей в фиде за запрос")
+    parser.add_argument("--rounds", type=int, default=20, help="циклов get_all_rss_news")
+    parser.add_argument("--commands", type=int, default=200, help="одновременных команд /latest")
+    parser.add_argument("--ticks", type=int, default=3, help="вызовов scheduled_job + publish_job")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="средняя задержка GigaChat, сек")
+    parser.add_argument("--llm-errors", type=float, default=0.0, help="доля ответов 500 от GigaChat")
+    parser.add_argument("--llm-stubs", type=float, default=0.0, help="доля ответов-заглушек от GigaChat")
+    parser.add_argument("--tg-latency", type=float, default=0.02, help="задержка Bot API, сек")
+    parser.add_argument("--tg-chat-rate", type=float, default=30.0, help="лимит заглушки Telegram, сообщений/с в чат")
+    parser.add_argument("--chat-id", type=int, default=1000, help="чат публикации (>0 — личный, <0 — группа)")
+    parser.add_argument("--limiter-rate", type=float, default=None,
+                        help="переопределить лимит бота на чат, сообщений/с (по умолчанию — как в проде)")
+    parser.add_argument("--metrics", action="store_true", help="в конце вывести метрики Prometheus")
+    args = parser.parse_args()
+    scenarios = {name.strip() for name in args.scenarios.split(",")}
+
+    rss = await FakeRssServer(args.feeds, args.items, args.change_rate).start()
+    gigachat = await FakeGigaChatServer(args.llm_latency, args.llm_latency / 3, args.llm_errors, args.llm_stubs).start()
+    telegram = await FakeTelegramServer(args.tg_latency, args.tg_chat_rate).start()
+
+    # Все обращения бота — только к заглушкам
+    feed_registry.urls = rss.feed_urls()
+    feed_registry.loaded_at = float("inf")
+    gigachat_client.base_url = gigachat.url
+    bot = Bot(token=os.environ["TOKEN"], session=AiohttpSession(api=TelegramAPIServer.from_base(telegram.url)))
+    if args.limiter_rate:
+        rate_limiter.PRIVATE_CHAT_RATE = args.limiter_rate
+        rate_limiter.GROUP_CHAT_PER_MINUTE = args.limiter_rate * 60
+
+    print(
+        f"Фидов: {args.feeds} × {args.items} записей, LLM {args.llm_latency} с (ошибок {args.llm_errors:.0%}), "
+        f"Telegram {args.tg_latency * 1000:.0f} мс, лимит {args.tg_chat_rate}/с на чат"
+    )
+    try:
+        if "rss" in scenarios:
+            await bench_rss(args, rss)
+        if "latest" in scenarios:
+            latest_cache.update(await get_all_rss_news(rss.feed_urls()))
+            await bench_latest(args, bot, telegram)
+        if "tick" in scenarios:
+            await bench_tick(args, rss, gigachat, bot, telegram)
+        if args.metrics:
+            sys.stdout.write(render_metrics())
+    finally:
+        await bot.session.close()
+        await close_http_session()
+        shutdown_parse_pool()
+        for server in (rss, gigachat, telegram):
+            await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,289 @@
+# benchmarks/fakes.py
+"""
+Локальные заглушки внешних сервисов для офлайн-бенчмарков.
+
+    FakeRssServer       — RSS-фиды заданного размера, новые записи появляются с заданной частотой,
+                          поддерживает ETag / If-None-Match (ответ 304); отдаёт и HTML-страницы статей
+    FakeGigaChatServer  — прокси GigaChat (/oauth/, /chat/completions) с задержкой, долей ошибок
+                          и ответов-заглушек; при stream=true отдаёт ответ SSE-фрагментами
+    FakeTelegramServer  — Bot API (/bot<token>/<method>) с лимитом сообщений в чат и ответом 429
+
+Все серверы слушают 127.0.0.1 на свободном порту; адрес — в .url после start().
+"""
+import re
+import json
+import random
+import time
+import hashlib
+import asyncio
+from email.utils import format_datetime
+from datetime import datetime, timezone
+from aiohttp import web
+
+WORDS = (
+    "valve bethesda nintendo sony xbox steam patch update trailer release delay studio shooter "
+    "rpg strategy indie remake sequel beta dlc expansion console handheld esports tournament "
+    "modding engine unreal unity roadmap season battlepass layoffs acquisition rating review "
+    "demo festival showcase leak rumor price discount sale crossplay server outage"
+).split()
+
+
+class FakeServer:
+    """Общая обвязка: aiohttp-приложение на 127.0.0.1 и случайном свободном порту."""
+
+    def __init__(self):
+        self.app = web.Application()
+        self.runner = None
+        self.url = None
+        self.requests = 0
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+class FakeRssServer(FakeServer):
+    """
+    feeds фидов по адресу /feed/<n>, в каждом items записей.
+    change_rate — вероятность, что к очередному запросу в фиде появится new_per_change новых записей.
+    """
+
+    def __init__(self, feeds=3, items=50, change_rate=0.3, new_per_change=2, desc_len=800, seed=1):
+        super().__init__()
+        self.feeds = feeds
+        self.items = items
+        self.change_rate = change_rate
+        self.new_per_change = new_per_change
+        self.description = ("Подробности новости для бенчмарка. " * (desc_len // 36 + 1))[:desc_len]
+        self.random = random.Random(seed)
+        self.heads = [items] * feeds      # номер самой свежей записи в каждом фиде
+        self.not_modified = 0
+        self.article_requests = 0
+        self.app.router.add_get("/feed/{n}", self.handle_feed)
+        self.app.router.add_get("/article/{feed}/{number}", self.handle_article)
+
+    def feed_urls(self):
+        return [f"{self.url}/feed/{n}" for n in range(self.feeds)]
+
+    def _title(self, feed, number):
+        # Заголовки из случайных слов, чтобы индекс дубликатов не склеивал разные новости
+        rnd = random.Random(feed * 1_000_003 + number)
+        return " ".join(rnd.sample(WORDS, 6)).capitalize() + f" #{feed}-{number}"
+
+    def _render(self, feed):
+        head = self.heads[feed]
+        now = datetime.now(timezone.utc)
+        entries = "".join(
+            f"<item><title>{self._title(feed, number)}</title>"
+            f"<link>{self.url}/article/{feed}/{number}</link>"
+            f"<pubDate>{format_datetime(now)}</pubDate>"
+            f"<description><![CDATA[<p>{self.description}</p>]]></description></item>"
+            for number in range(head, head - self.items, -1)
+        )
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+            f"<title>Fake feed {feed}</title><link>http://news.local/{feed}</link>{entries}</channel></rss>"
+        ).encode("utf-8")
+
+    async def handle_feed(self, request):
+        self.requests += 1
+        feed = int(request.match_info["n"])
+        if self.random.random() < self.change_rate:
+            self.heads[feed] += self.new_per_change
+
+        etag = f'"{feed}-{self.heads[feed]}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(
+            body=self._render(feed),
+            headers={"ETag": etag, "Content-Type": "application/rss+xml; charset=utf-8"},
+        )
+
+
+    async def handle_article(self, request):
+        self.article_requests += 1
+        feed, number = int(request.match_info["feed"]), int(request.match_info["number"])
+        paragraphs = "".join(f"<p>{self.description} Абзац {i}.</p>" for i in range(8))
+        html = (
+            f"<html><head><title>{self._title(feed, number)}</title>"
+            "<script>var tracking = {enabled: true};</script></head><body>"
+            "<header><nav><a href='/'>Главная</a> <a href='/news'>Новости</a></nav></header>"
+            f"<main><article><h1>{self._title(feed, number)}</h1>{paragraphs}</article></main>"
+            "<footer><p>© Fake media, все права защищены, перепечатка запрещена без ссылки.</p></footer>"
+            "</body></html>"
+        )
+        return web.Response(text=html, content_type="text/html")
+
+
+class FakeGigaChatServer(FakeServer):
+    """
+    Прокси GigaChat: ответ через latency ± jitter секунд, error_rate — доля ответов 500,
+    stub_rate — доля ответов-заглушек «источник недоступен». В потоковом режиме первый
+    фрагмент приходит через ttft_share от задержки, остальные равномерно за оставшееся время.
+    token_ttl — время жизни выдаваемого токена (сек).
+    """
+
+    def __init__(self, latency=0.5, jitter=0.2, error_rate=0.0, stub_rate=0.0, ttft_share=0.2,
+                 token_ttl=30 * 60, seed=2):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.stub_rate = stub_rate
+        self.ttft_share = ttft_share
+        self.token_ttl = token_ttl
+        self.random = random.Random(seed)
+        self.token_requests = 0
+        self.errors = 0
+        self.prompt_bytes = 0
+        self.aborted_streams = 0
+        self.app.router.add_post("/oauth/", self.handle_oauth)
+        self.app.router.add_post("/chat/completions", self.handle_completion)
+
+    async def handle_oauth(self, request):
+        self.token_requests += 1
+        return web.json_response({
+            "access_token": f"fake-{self.token_requests}",
+            "expires_at": int((time.time() + self.token_ttl) * 1000),
+        })
+
+    @staticmethod
+    def _note(url):
+        digest = hashlib.md5(url.encode()).hexdigest()[:8]
+        return (
+            f"Ссылка на источник: {url}\n"
+            f"Заголовок: Тестовая новость {digest}\n"
+            "Текст: Разработчики выпустили крупное обновление, игроки уже оценили изменения. "
+            "Сообщество обсуждает новые механики, а студия обещает продолжить поддержку.\n"
+            "Теги: #игры #новости #бенчмарк"
+        )
+
+    @staticmethod
+    def _stub(url):
+        return (
+            f"Ссылка: {url}\n"
+            "Заголовок: Подробности пока неизвестны\n"
+            "Текст: Мне не удалось найти достоверную информацию по этой ссылке, "
+            "поэтому полная новость недоступна. Возможно, источник был удалён или временно закрыт.\n"
+            "Теги: #новость #игры #источникнедоступен"
+        )
+
+    def _reply(self, prompt):
+        # Пакетный промт: список статей "N. url" после строки "Статьи:"
+        if "<<<НОВОСТЬ" in prompt and "Статьи:" in prompt:
+            articles = re.findall(r"^(\d+)\. (\S+)$", prompt.split("Статьи:")[-1], re.M)
+            return "\n".join(
+                f"<<<НОВОСТЬ {number}>>>\n{self._note(url)}\n<<<КОНЕЦ {number}>>>" for number, url in articles
+            )
+        url = prompt.split("Ссылка на источник:")[1].split()[0] if "Ссылка на источник:" in prompt else "-"
+        if self.random.random() < self.stub_rate:
+            return self._stub(url)
+        return self._note(url)
+
+    async def handle_completion(self, request):
+        self.requests += 1
+        payload = await request.json()
+        prompt = payload["messages"][-1]["content"]
+        self.prompt_bytes += len(prompt.encode())
+        delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+        if self.random.random() < self.error_rate:
+            await asyncio.sleep(delay * self.ttft_share)
+            self.errors += 1
+            return web.Response(status=500, text="fake upstream error")
+
+        reply = self._reply(prompt)
+        if payload.get("stream"):
+            return await self._stream(request, reply, delay)
+
+        await asyncio.sleep(delay)
+        return web.json_response({
+            "choices": [{"message": {"role": "assistant", "content": reply}, "index": 0}],
+            "model": payload.get("model"),
+        })
+
+    async def _stream(self, request, reply, delay):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        chunks = [reply[i:i + 40] for i in range(0, len(reply), 40)]
+        await asyncio.sleep(delay * self.ttft_share)
+        step = delay * (1 - self.ttft_share) / max(len(chunks) - 1, 1)
+        try:
+            for number, chunk in enumerate(chunks):
+                if number:
+                    await asyncio.sleep(step)
+                event = {"choices": [{"delta": {"content": chunk}, "index": 0}]}
+                await response.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode())
+            await response.write(b"data: [DONE]\n\n")
+        except ConnectionResetError:
+            # Клиент оборвал генерацию
+            self.aborted_streams += 1
+        return response
+
+
+class FakeTelegramServer(FakeServer):
+    """
+    Bot API: sendMessage отвечает через latency секунд; больше chat_rate сообщений в секунду
+    в один чат — ответ 429 с retry_after (как flood wait у настоящего Telegram).
+    """
+
+    def __init__(self, latency=0.02, chat_rate=30.0, retry_after=1):
+        super().__init__()
+        self.latency = latency
+        self.chat_rate = chat_rate
+        self.retry_after = retry_after
+        self.sent = []                 # (chat_id, время, текст)
+        self.flood_responses = 0
+        self._last_sent = {}
+        self._message_id = 0
+        self.app.router.add_post("/bot{token}/{method}", self.handle_method)
+
+    async def handle_method(self, request):
+        self.requests += 1
+        method = request.match_info["method"].lower()
+        data = await request.post()
+        await asyncio.sleep(self.latency)
+
+        if method == "getme":
+            return self._ok({"id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"})
+        if method != "sendmessage":
+            return self._ok(True)
+
+        chat_id = int(data["chat_id"])
+        now = time.monotonic()
+        last = self._last_sent.get(chat_id)
+        if last is not None and now - last < 1 / self.chat_rate:
+            self.flood_responses += 1
+            return web.json_response({
+                "ok": False,
+                "error_code": 429,
+                "description": f"Too Many Requests: retry after {self.retry_after}",
+                "parameters": {"retry_after": self.retry_after},
+            })
+
+        self._last_sent[chat_id] = now
+        self._message_id += 1
+        self.sent.append((chat_id, now, data.get("text", "")))
+        return self._ok({
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private" if chat_id > 0 else "supergroup"},
+            "text": data.get("text", ""),
+        })
+
+    @staticmethod
+    def _ok(result):
+        return web.Response(
+            text=json.dumps({"ok": True, "result": result}), content_type="application/json"
+        )
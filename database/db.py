@@ -28,17 +28,42 @@ engine = create_async_engine(DATABASE_URL, echo=False)
 AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False)
 
 async def init_db():
-    """Проверяет наличие таблиц и создаёт их при необходимости"""
+    """
+    Приводит схему БД к текущей версии. Если в schema_version уже записана
+    SCHEMA_VERSION, старт обходится одним запросом без проверки таблиц.
+    """
     import database.models  # Импортируем модели, чтобы SQLAlchemy их увидел
+    from database.migrations import (
+        SCHEMA_VERSION, apply_migrations, get_schema_version, lock_migrations, set_schema_version,
+    )
 
     async with engine.begin() as conn:
+        version = await get_schema_version(conn)
+        if version is not None and version >= SCHEMA_VERSION:
+            print(f"Схема БД актуальна (версия {version}) ✅")
+            return
+
+        # Другой экземпляр мог мигрировать, пока мы ждали блокировку
+        await lock_migrations(conn)
+        version = await get_schema_version(conn)
+        if version is not None and version >= SCHEMA_VERSION:
+            print(f"Схема БД обновлена другим экземпляром (версия {version}) ✅")
+            return
+
         # Проверка, есть ли таблицы
         result = await conn.execute(text(
             "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public';"
         ))
-        tables = [row[0] for row in result]
-        if not tables:
-            print("Таблицы не найдены, создаём...")
+        tables = {row[0] for row in result}
+        missing = [name for name in Base.metadata.tables if name not in tables]
+        if missing:
+            print(f"Не найдены таблицы {', '.join(missing)}, создаём...")
+            # create_all создаёт только отсутствующие таблицы, существующие не трогает
             await conn.run_sync(Base.metadata.create_all)
         else:
             print("Все таблицы уже существуют ✅")
+
+        # Индексы и разовые заполнения для таблиц, созданных старыми версиями
+        await apply_migrations(conn, created_tables=missing)
+        await set_schema_version(conn, SCHEMA_VERSION)
+        print(f"Схема БД обновлена до версии {SCHEMA_VERSION} ✅")
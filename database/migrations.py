@@ -0,0 +1,85 @@
+# database/migrations.py
+"""
+Миграции для баз, созданных до появления новых индексов и таблиц.
+
+Новые таблицы создаёт Base.metadata.create_all в init_db, а здесь — то,
+чего create_all для существующих таблиц не делает:
+  1. индексы на sent_news.news_id и news.published_at;
+  2. флаг enabled и приоритет фидов в реестре feeds;
+  3. колонки аренды news_outbox (locked_by, locked_until), индекс по активным арендам
+     список целей, уже получивших новость (delivered_targets), и флаг незавершённой
+     рассылки подписчикам (fanout_pending) с частичным индексом;
+  4. подписка пользователей (subscribed, subscribed_at), bigint для users.tg_id;
+  5. разовое заполнение news_outbox неотправленными новостями
+     (только в момент создания таблицы, чтобы не сканировать историю на каждом старте).
+
+Все операторы идемпотентны. CREATE INDEX на большой таблице блокирует запись
+на время построения; при необходимости его можно заранее выполнить вручную
+с CONCURRENTLY — тогда здесь он будет пропущен благодаря IF NOT EXISTS.
+
+Применённая версия записывается в schema_version. Если она не меньше
+SCHEMA_VERSION, init_db ничего не проверяет, поэтому SCHEMA_VERSION нужно
+увеличивать при каждом изменении моделей или SCHEMA_MIGRATIONS.
+"""
+from sqlalchemy import text
+
+SCHEMA_VERSION = 5
+
+# Ключ advisory-блокировки: экземпляры бота, стартующие одновременно, мигрируют по очереди
+MIGRATION_LOCK_ID = 746_201
+
+SCHEMA_MIGRATIONS = [
+    "CREATE INDEX IF NOT EXISTS ix_sent_news_news_id ON sent_news (news_id)",
+    "CREATE INDEX IF NOT EXISTS ix_news_published_at ON news (published_at)",
+    "ALTER TABLE feeds ADD COLUMN IF NOT EXISTS enabled BOOLEAN NOT NULL DEFAULT true",
+    "ALTER TABLE feeds ADD COLUMN IF NOT EXISTS priority INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE news_outbox ADD COLUMN IF NOT EXISTS locked_by VARCHAR(128)",
+    "ALTER TABLE news_outbox ADD COLUMN IF NOT EXISTS locked_until TIMESTAMP WITHOUT TIME ZONE",
+    "CREATE INDEX IF NOT EXISTS ix_news_outbox_leases ON news_outbox (locked_until) WHERE status = 'processing'",
+    "ALTER TABLE news_outbox ADD COLUMN IF NOT EXISTS delivered_targets TEXT",
+    "ALTER TABLE news_outbox ADD COLUMN IF NOT EXISTS fanout_pending BOOLEAN NOT NULL DEFAULT false",
+    "CREATE INDEX IF NOT EXISTS ix_news_outbox_fanout ON news_outbox (id) WHERE fanout_pending",
+    "ALTER TABLE users ALTER COLUMN tg_id TYPE BIGINT",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS subscribed BOOLEAN NOT NULL DEFAULT false",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS subscribed_at TIMESTAMP WITHOUT TIME ZONE",
+    "CREATE INDEX IF NOT EXISTS ix_users_subscribed ON users (id) WHERE subscribed",
+]
+
+OUTBOX_BACKFILL = """
+    INSERT INTO news_outbox (news_id, status, attempts, created_at, updated_at)
+    SELECT n.id, 'pending', 0, now(), now()
+    FROM news n
+    WHERE NOT EXISTS (SELECT 1 FROM sent_news s WHERE s.news_id = n.id)
+    ORDER BY n.published_at, n.id
+    ON CONFLICT (news_id) DO NOTHING
+"""
+
+
+async def apply_migrations(conn, created_tables):
+    """Применяет миграции в рамках переданного соединения."""
+    for statement in SCHEMA_MIGRATIONS:
+        await conn.execute(text(statement))
+
+    if "news_outbox" in created_tables:
+        result = await conn.execute(text(OUTBOX_BACKFILL))
+        print(f"📬 Очередь публикации заполнена: {result.rowcount} новостей")
+
+
+async def get_schema_version(conn):
+    """Версия схемы из schema_version или None, если таблицы ещё нет."""
+    exists = await conn.scalar(text("SELECT to_regclass('public.schema_version') IS NOT NULL"))
+    if not exists:
+        return None
+    return await conn.scalar(text("SELECT max(version) FROM schema_version"))
+
+
+async def lock_migrations(conn):
+    """Блокировка до конца транзакции: пока один экземпляр мигрирует, остальные ждут."""
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_ID})
+
+
+async def set_schema_version(conn, version=SCHEMA_VERSION):
+    await conn.execute(
+        text("INSERT INTO schema_version (version, applied_at) VALUES (:version, now()) ON CONFLICT DO NOTHING"),
+        {"version": version},
+    )
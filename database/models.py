@@ -1,5 +1,5 @@
 # database/models.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Text, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database.db import Base
@@ -8,9 +8,16 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True)
-    tg_id = Column(Integer, unique=True, nullable=False)
+    tg_id = Column(BigInteger, unique=True, nullable=False)  # id чата: у групп и новых аккаунтов не влезает в int4
     username = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # Подписка на рассылку новостей (/subscribe, /unsubscribe)
+    subscribed = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    subscribed_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_users_subscribed", "id", postgresql_where=text("subscribed")),
+    )
 
     sent_news = relationship("SentNews", back_populates="user")
 
@@ -22,6 +29,8 @@ class Feed(Base):
     name = Column(String, nullable=False)
     url = Column(Text, unique=True, nullable=False)
     type = Column(String, nullable=False)  # rss/api/parser
+    enabled = Column(Boolean, nullable=False, default=True, server_default=text("true"))
+    priority = Column(Integer, nullable=False, default=0, server_default=text("0"))  # больше — раньше
 
 
 class News(Base):
@@ -33,7 +42,7 @@ class News(Base):
     source_id = Column(ForeignKey("feeds.id"))
 
     # 🕓 Дата публикации из RSS
-    published_at = Column(DateTime, nullable=False)
+    published_at = Column(DateTime, nullable=False, index=True)
 
     source = relationship("Feed")
     sent_to = relationship("SentNews", back_populates="news")
@@ -44,7 +53,7 @@ class SentNews(Base):
 
     id = Column(Integer, primary_key=True)
     user_id = Column(ForeignKey("users.id"))
-    news_id = Column(ForeignKey("news.id"))
+    news_id = Column(ForeignKey("news.id"), index=True)
     sent_at = Column(DateTime, default=datetime.utcnow)
 
     __table_args__ = (
@@ -53,3 +62,61 @@ class SentNews(Base):
 
     user = relationship("User", back_populates="sent_news")
     news = relationship("News", back_populates="sent_to")
+
+
+class NewsOutbox(Base):
+    """Очередь публикации: одна строка на новость, ожидающие отбираются по частичному индексу."""
+    __tablename__ = "news_outbox"
+
+    id = Column(Integer, primary_key=True)
+    news_id = Column(ForeignKey("news.id", ondelete="CASCADE"), unique=True, nullable=False)
+    status = Column(String(16), nullable=False, default="pending")  # pending / processing / sent / failed / duplicate
+    attempts = Column(Integer, nullable=False, default=0)
+    # Аренда воркера (для нескольких экземпляров бота)
+    locked_by = Column(String(128))
+    locked_until = Column(DateTime)
+    # Цели публикации ("chat_id:topic_id" через запятую), уже получившие новость при частичной отправке
+    delivered_targets = Column(Text)
+    # Рассылка подписчикам после публикации ещё не завершена (продолжается по аренде)
+    fanout_pending = Column(Boolean, nullable=False, default=False, server_default=text("false"))
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_news_outbox_pending", "id", postgresql_where=text("status = 'pending'")),
+        Index("ix_news_outbox_leases", "locked_until", postgresql_where=text("status = 'processing'")),
+        Index("ix_news_outbox_fanout", "id", postgresql_where=text("fanout_pending")),
+    )
+
+    news = relationship("News")
+
+
+class SummaryCache(Base):
+    __tablename__ = "summary_cache"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(Text, nullable=False)
+    # Хеш PROMPT_TEMPLATE: при смене промта старые тексты не используются
+    prompt_hash = Column(String(16), nullable=False)
+    summary = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("url", "prompt_hash", name="unique_summary_url_prompt"),
+    )
+
+
+class ArchivedUrl(Base):
+    """URL новостей, перенесённых в архив (services/retention.py): приём не вставляет их повторно."""
+    __tablename__ = "archived_urls"
+
+    url = Column(Text, primary_key=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    # Одна строка на каждую применённую версию схемы (database/migrations.py: SCHEMA_VERSION)
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    applied_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -36,11 +36,32 @@ LOG_FILE_MAX_SIZE = LOG_FILE_MAX_SIZE_MB * 1024 * 1024  # В байтах
 LOG_FILE_BACKUP_COUNT = 20  # Сколько старых логов хранить
 
 LOG_ROTATE = True                 # Включить ротацию
-LOG_ROTATE_BY_SIZE = True        # Не используем ротацию по размеру (handled by date)
+LOG_ROTATE_BY_SIZE = True         # Ротация по размеру внутри дневной папки
 LOG_ROTATE_BY_TIME = True         # Да, ротация по дате (ежедневные папки)
 
 # Уровень логирования: DEBUG, INFO, WARNING, ERROR, CRITICAL
-LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG").upper()
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Сэмплирование частых однотипных сообщений (по записи на каждую новость/фид):
+# не больше LOG_SAMPLE_LIMIT сообщений одного вида за LOG_SAMPLE_INTERVAL секунд
+LOG_SAMPLE_LIMIT = int(os.getenv("LOG_SAMPLE_LIMIT", 20))
+LOG_SAMPLE_INTERVAL = int(os.getenv("LOG_SAMPLE_INTERVAL", 60))
+
+# --- Старт бота ---
+# Живой тест RSS при старте: background — в фоне после запуска polling (по умолчанию),
+# blocking — до запуска, как раньше; off — не выполнять
+STARTUP_SELF_TEST = os.getenv("STARTUP_SELF_TEST", "background").lower()
+
+# --- Получение обновлений от Telegram ---
+# polling — long polling (по умолчанию); webhook — HTTP-сервер aiohttp за reverse proxy
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")                # где слушать
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8080))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram/webhook")
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "").rstrip("/")              # внешний адрес, например https://bot.example.com
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")                        # X-Telegram-Bot-Api-Secret-Token
+# Выключается на дополнительных воркерах, которые только принимают обновления
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
 
 # --- Дополнительные пути ---
 def get_today_log_dir():
@@ -48,18 +69,29 @@ def get_today_log_dir():
     return os.path.join("logs", datetime.now().strftime("%Y-%m-%d"))
 
 # --- Проверки обязательных параметров ---
-# Проверка токена
-if not TOKEN:
-    raise EnvironmentError("❌ Не найден TOKEN в .env")
-
-# Проверка БД
-if not all(DB_CONFIG.values()):
-    missing = [k for k, v in DB_CONFIG.items() if not v]
-    raise EnvironmentError(f"❌ Отсутствуют параметры БД: {', '.join(missing)}")
-
-# Проверка ID группы
-try:
-    if GROUP_CHAT_ID:
-        GROUP_CHAT_ID = int(GROUP_CHAT_ID)
-except (ValueError, TypeError):
-    raise ValueError("❌ GROUP_CHAT_ID должен быть целым числом")
+# Вызываются при старте бота, а не при импорте: настройки логирования
+# должны быть доступны и без полного .env (скрипты, бенчмарки)
+def check_required_settings():
+    global GROUP_CHAT_ID
+
+    # Проверка токена
+    if not TOKEN:
+        raise EnvironmentError("❌ Не найден TOKEN в .env")
+
+    # Проверка БД
+    if not all(DB_CONFIG.values()):
+        missing = [k for k, v in DB_CONFIG.items() if not v]
+        raise EnvironmentError(f"❌ Отсутствуют параметры БД: {', '.join(missing)}")
+
+    # Проверка режима webhook
+    if BOT_MODE not in ("polling", "webhook"):
+        raise ValueError(f"❌ BOT_MODE должен быть polling или webhook, получено: {BOT_MODE}")
+    if BOT_MODE == "webhook" and not (WEBHOOK_URL and WEBHOOK_SECRET):
+        raise EnvironmentError("❌ Для BOT_MODE=webhook нужны WEBHOOK_URL и WEBHOOK_SECRET")
+
+    # Проверка ID группы
+    try:
+        if GROUP_CHAT_ID:
+            GROUP_CHAT_ID = int(GROUP_CHAT_ID)
+    except (ValueError, TypeError):
+        raise ValueError("❌ GROUP_CHAT_ID должен быть целым числом")
@@ -2,7 +2,7 @@
 from aiogram import Router, Bot
 from aiogram.filters import Command
 from aiogram.types import Message
-from services.rss_reader import get_all_rss_news
+from services.latest_cache import latest_cache
 from logger.logger import logger
 import os
 
@@ -42,18 +42,16 @@ def format_news_message(news_item, total_count=None):
 
 @news_router.message(Command("latest"))
 async def send_latest_news(message: Message, bot: Bot):
-    """Отправляет последние новости из RSS‑лент."""
+    """Отправляет последние новости из кэша, который заполняет планировщик."""
     logger.info(
         f"Получена команда /latest от пользователя {message.from_user.id} в чате {message.chat.id}"
     )
 
     try:
-        await message.answer("🔄 Загружаю свежие новости...")
-        logger.info("Начинается сбор новостей из RSS‑лент")
-
-        news = await get_all_rss_news()
+        # Ни сети, ни БД: только снимок в памяти
+        news = latest_cache.get()
         count = len(news)
-        logger.info(f"Получено {count} новостей")
+        logger.info(f"В кэше {count} новостей")
 
         if not news:
             logger.warning("Новости не найдены — возвращаем пустой ответ пользователю")
@@ -1,6 +1,8 @@
 # handlers/user_handlers.py
 from aiogram import Router, types
 from aiogram.filters import Command
+from services.subscriptions import subscribe, unsubscribe
+from logger.logger import logger
 
 router = Router()
 
@@ -8,20 +10,35 @@ router = Router()
 async def cmd_start(message: types.Message):
     await message.answer("Привет! Я бот, который следит за новостями 🗞")
 
-@router.message(Command("latest"))
-async def cmd_latest(message: types.Message):
-    from sqlalchemy import select
-    from database.db import AsyncSessionLocal
-    from database.models import News
 
-    async with AsyncSessionLocal() as session:
-        stmt = select(News).order_by(News.published_at.desc()).limit(5)
-        result = await session.execute(stmt)
-        news_list = result.scalars().all()
+@router.message(Command("subscribe"))
+async def cmd_subscribe(message: types.Message):
+    username = message.from_user.username if message.from_user else None
+    try:
+        created = await subscribe(message.chat.id, username)
+    except Exception as e:
+        logger.exception(f"Ошибка подписки чата {message.chat.id}: {e}")
+        await message.answer("❌ Не удалось оформить подписку, попробуйте позже")
+        return
+
+    if created:
+        logger.info(f"📬 Чат {message.chat.id} подписался на рассылку")
+        await message.answer("✅ Подписка оформлена: свежие новости будут приходить сюда. Отписаться — /unsubscribe")
+    else:
+        await message.answer("👌 Этот чат уже подписан на новости")
+
 
-    if not news_list:
-        await message.answer("Пока нет свежих новостей 😴")
+@router.message(Command("unsubscribe"))
+async def cmd_unsubscribe(message: types.Message):
+    try:
+        removed = await unsubscribe(message.chat.id)
+    except Exception as e:
+        logger.exception(f"Ошибка отписки чата {message.chat.id}: {e}")
+        await message.answer("❌ Не удалось отменить подписку, попробуйте позже")
         return
 
-    response = "\n\n".join([f"<b>{n.title}</b>\n{n.url}" for n in news_list])
-    await message.answer(response, parse_mode="HTML")
+    if removed:
+        logger.info(f"📭 Чат {message.chat.id} отписался от рассылки")
+        await message.answer("Подписка отменена. Вернуться — /subscribe")
+    else:
+        await message.answer("Этот чат и не был подписан 🙂")
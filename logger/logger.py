@@ -1,26 +1,120 @@
 # logger/logger.py
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 
+from globals.config import (
+    LOG_LEVEL,
+    LOG_ROTATE,
+    LOG_ROTATE_BY_SIZE,
+    LOG_ROTATE_BY_TIME,
+    LOG_FILE_MAX_SIZE,
+    LOG_FILE_BACKUP_COUNT,
+    LOG_SAMPLE_LIMIT,
+    LOG_SAMPLE_INTERVAL,
+)
+
 # === Настройка путей для логов ===
-# Базовая директория для логов
-BASE_LOG_DIR = Path(__file__).resolve().parent.parent / "logs"
+# Базовая директория для логов (LOG_DIR переопределяет её для тестов и бенчмарков)
+BASE_LOG_DIR = Path(os.getenv("LOG_DIR") or Path(__file__).resolve().parent.parent / "logs")
 
 # Создаём основную папку logs/ при старте, если нет
 BASE_LOG_DIR.mkdir(parents=True, exist_ok=True)
 
-# Подпапка для текущей даты
-TODAY_DIR = BASE_LOG_DIR / datetime.now().strftime("%Y-%m-%d")
-TODAY_DIR.mkdir(parents=True, exist_ok=True)
+LOG_FILE_NAME = "gamecom_bot.log"
+
+
+def today_log_file():
+    """Файл лога в папке с текущей датой."""
+    return BASE_LOG_DIR / datetime.now().strftime("%Y-%m-%d") / LOG_FILE_NAME
+
+
+class DailySizeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Пишет в logs/<дата>/gamecom_bot.log: с наступлением новой даты переходит в новую папку,
+    а внутри дня ротирует файл по размеру (gamecom_bot.log.1, .2, ...).
+    """
+
+    def __init__(self, by_time=True, by_size=True, max_bytes=0, backup_count=0):
+        self.by_time = by_time
+        self.current_date = datetime.now().date()
+        path = today_log_file()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(
+            path,
+            maxBytes=max_bytes if by_size else 0,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+
+    def shouldRollover(self, record):
+        if self.by_time and datetime.now().date() != self.current_date:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        today = datetime.now().date()
+        if self.by_time and today != self.current_date:
+            # Новый день — новая папка; поток откроется при следующей записи
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            self.current_date = today
+            path = today_log_file()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.baseFilename = os.fspath(path)
+            return
+        super().doRollover()
+
+
+class SampleFilter(logging.Filter):
+    """
+    Ограничивает частые однотипные сообщения: записи с extra={"sample_key": ...}
+    проходят не чаще LOG_SAMPLE_LIMIT раз за LOG_SAMPLE_INTERVAL секунд на ключ.
+    Первая запись после паузы сообщает, сколько похожих было пропущено.
+    """
+
+    def __init__(self, limit=LOG_SAMPLE_LIMIT, interval=LOG_SAMPLE_INTERVAL):
+        super().__init__()
+        self.limit = limit
+        self.interval = interval
+        self._windows = {}  # ключ -> [начало окна, сообщений в окне]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = getattr(record, "sample_key", None)
+        if key is None:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = max(window[1] - self.limit, 0) if window else 0
+                window = self._windows[key] = [now, 0]
+                if suppressed:
+                    record.msg = f"{record.getMessage()} (пропущено похожих сообщений: {suppressed})"
+                    record.args = None
+            window[1] += 1
+            return window[1] <= self.limit
+
+
+def sampled(key):
+    """extra для частых сообщений: logger.info(..., extra=sampled("rss_item"))."""
+    return {"sample_key": key}
 
-# Файл лога
-LOG_FILE = TODAY_DIR / "gamecom_bot.log"
 
 # === Настройка логгера ===
 logger = logging.getLogger("gamecom_bot")
-logger.setLevel(logging.DEBUG)
+logger.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
 
 # Формат вывода
 formatter = logging.Formatter(
@@ -33,12 +127,29 @@ console_handler = logging.StreamHandler(sys.stdout)
 console_handler.setFormatter(formatter)
 
 # === Обработчик для записи в файл ===
-file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+if LOG_ROTATE:
+    file_handler = DailySizeRotatingFileHandler(
+        by_time=LOG_ROTATE_BY_TIME,
+        by_size=LOG_ROTATE_BY_SIZE,
+        max_bytes=LOG_FILE_MAX_SIZE,
+        backup_count=LOG_FILE_BACKUP_COUNT,
+    )
+else:
+    today_log_file().parent.mkdir(parents=True, exist_ok=True)
+    file_handler = logging.FileHandler(today_log_file(), encoding="utf-8", delay=True)
 file_handler.setFormatter(formatter)
 
-# === Добавляем обработчики ===
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+# === Очередь: event loop только кладёт запись в очередь, запись на диск — в отдельном потоке ===
+log_queue = queue.SimpleQueue()
+queue_handler = logging.handlers.QueueHandler(log_queue)
+queue_handler.addFilter(SampleFilter())
+logger.addHandler(queue_handler)
+
+queue_listener = logging.handlers.QueueListener(
+    log_queue, console_handler, file_handler, respect_handler_level=True
+)
+queue_listener.start()
+atexit.register(queue_listener.stop)
 
 # --- Подавляем шум от некоторых библиотек ---
 for noisy in ["aiogram", "aiohttp.access", "httpx", "httpcore"]:
@@ -46,4 +157,4 @@ for noisy in ["aiogram", "aiohttp.access", "httpx", "httpcore"]:
     logging.getLogger(noisy).propagate = False
 
 # === Готово ===
-logger.info(f"Инициализация логгера: {LOG_FILE}")
+logger.info(f"Инициализация логгера: {file_handler.baseFilename}")
@@ -1,4 +1,9 @@
 # main.py
+import time
+
+# Точка отсчёта для замера времени старта (до тяжёлых импортов)
+PROCESS_STARTED_AT = time.monotonic()
+
 import asyncio
 import os
 from dotenv import load_dotenv
@@ -18,16 +23,56 @@ logger.info(f"Загружены из .env: TOKEN={'***' if TOKEN else 'НЕТ'}
 if not TOKEN:
     raise ValueError("❌ TOKEN не найден в переменных окружения")
 
+from globals.config import (
+    check_required_settings,
+    STARTUP_SELF_TEST,
+    BOT_MODE,
+    WEBHOOK_HOST,
+    WEBHOOK_PORT,
+    WEBHOOK_PATH,
+    WEBHOOK_URL,
+    WEBHOOK_SECRET,
+    SCHEDULER_ENABLED,
+)
+check_required_settings()
+
 # === 3. И только теперь подключаем остальные модули ===
 from database.db import init_db
 from handlers import user_handlers
 from handlers.latest import news_router
 from services.scheduler import setup_scheduler
+from services.parse_pool import shutdown_parse_pool
+from services.http_client import start_http_client, close_http_session
+from services.metrics import start_metrics_server, stop_metrics_server, Gauge
+from services.sender import set_bot, wait_fanouts
+
+STARTUP_SECONDS = Gauge("startup_seconds", "Время от запуска процесса до этапа старта", ["phase"])
+
+
+def mark_startup(phase):
+    elapsed = time.monotonic() - PROCESS_STARTED_AT
+    STARTUP_SECONDS.set(elapsed, phase=phase)
+    logger.info(f"⏱ Старт: {phase} через {elapsed:.2f} с")
 
-# === 4. Создаём бота и диспетчер ===
-bot = Bot(token=TOKEN)
+
+mark_startup("imports")
+
+# === 4. Диспетчер; бот создаётся в main() ===
 dp = Dispatcher()
 
+
+_first_update_seen = False
+
+
+@dp.update.outer_middleware()
+async def first_update_timer(handler, event, data):
+    """Замеряет время от запуска процесса до первого обновления от Telegram."""
+    global _first_update_seen
+    if not _first_update_seen:
+        _first_update_seen = True
+        mark_startup("first_update")
+    return await handler(event, data)
+
 # === 5. Тест RSS при старте ===
 async def test_rss_manually():
     """Ручной тест RSS-читалки при старте."""
@@ -37,6 +82,11 @@ async def test_rss_manually():
         news = await get_all_rss_news()
         logger.info(f"🔧 Результат ручного теста: {len(news)} новостей")
 
+        # Заодно прогреваем кэш /latest, чтобы команда работала сразу после старта
+        if news:
+            from services.latest_cache import latest_cache
+            latest_cache.update(news)
+
         if news:
             for i, item in enumerate(news[:3]):
                 logger.info(f"🔧 Новость {i+1}: {item['title'][:50]}...")
@@ -45,24 +95,80 @@ async def test_rss_manually():
     except Exception as e:
         logger.exception(f"🔧 Ошибка в ручном тесте RSS: {e}")
 
-# === 6. Основной запуск ===
+# === 6. Приём обновлений ===
+async def run_polling(bot):
+    # Если раньше был включён webhook, getUpdates с ним конфликтует
+    await bot.delete_webhook(drop_pending_updates=False)
+    await dp.start_polling(bot)
+
+
+async def run_webhook(bot):
+    """
+    Обновления приходят POST-запросами на WEBHOOK_PATH; Telegram подписывает их секретом.
+    Воркеров можно запустить несколько за reverse proxy (остальным — SCHEDULER_ENABLED=false).
+    """
+    from aiohttp import web
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=WEBHOOK_SECRET).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+        await bot.set_webhook(
+            f"{WEBHOOK_URL}{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        logger.info(f"🪝 Webhook: слушаем {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}, адрес {WEBHOOK_URL}{WEBHOOK_PATH}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+# === 7. Основной запуск ===
 async def main():
+    bot = Bot(token=TOKEN)
+    set_bot(bot)
+    self_test_task = None
     try:
         await init_db()
+        mark_startup("db")
+        await start_http_client()
+        await start_metrics_server()
         dp.include_router(user_handlers.router)
         dp.include_router(news_router)
 
-        setup_scheduler()
-        await test_rss_manually()
+        if SCHEDULER_ENABLED:
+            setup_scheduler()
+        if STARTUP_SELF_TEST == "blocking":
+            await test_rss_manually()
+        elif STARTUP_SELF_TEST != "off":
+            # Живой опрос всех фидов не задерживает запуск polling и не валит старт при упавшем фиде
+            self_test_task = asyncio.create_task(test_rss_manually())
+        mark_startup(BOT_MODE)
 
         print("🚀 Бот запущен и следит за новостями.")
         logger.info("Бот запущен 🚀")
 
-        await dp.start_polling(bot)
+        if BOT_MODE == "webhook":
+            await run_webhook(bot)
+        else:
+            await run_polling(bot)
     except Exception as e:
         logger.exception(f"Критическая ошибка при запуске бота: {e}")
         print(f"❌ Ошибка запуска: {e}")
     finally:
+        if self_test_task is not None:
+            self_test_task.cancel()
+        # Даём фоновым рассылкам подписчикам закончиться, пока открыта сессия бота
+        await wait_fanouts(timeout=30)
+        shutdown_parse_pool()
+        await stop_metrics_server()
+        await close_http_session()
         await bot.session.close()
 
 if __name__ == "__main__":
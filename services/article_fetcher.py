@@ -0,0 +1,211 @@
+# services/article_fetcher.py
+"""
+Предзагрузка статей для LLM: страница скачивается с ограничением по байтам,
+основной текст вытаскивается потоковым HTML-парсером прямо по мере чтения,
+результат кэшируется по URL. В промт уходит урезанный текст вместо одной ссылки,
+поэтому модели не нужно «искать» материал и реже получаются заглушки.
+"""
+import os
+import time
+import codecs
+import asyncio
+from collections import OrderedDict
+from html.parser import HTMLParser
+import aiohttp
+from logger.logger import logger, sampled
+from services.http_client import get_http_session
+from services.metrics import Counter, Histogram
+
+# === Конфигурация ===
+ARTICLE_PREFETCH = os.getenv("ARTICLE_PREFETCH", "true").lower() == "true"
+ARTICLE_MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", 1536 * 1024))   # больше страницы не читаем
+ARTICLE_TIMEOUT = int(os.getenv("ARTICLE_TIMEOUT", 10))                # сек на страницу
+ARTICLE_TEXT_LIMIT = int(os.getenv("ARTICLE_TEXT_LIMIT", 3000))        # символов текста в промт
+ARTICLE_CACHE_SIZE = int(os.getenv("ARTICLE_CACHE_SIZE", 500))         # статей в LRU-кэше
+ARTICLE_FAILURE_TTL = int(os.getenv("ARTICLE_FAILURE_TTL", 300))       # сек до повторной попытки после неудачи
+ARTICLE_FETCH_CONCURRENCY = int(os.getenv("ARTICLE_FETCH_CONCURRENCY", 5))
+CHUNK_SIZE = 16 * 1024
+MIN_PARAGRAPH_LENGTH = 40      # короче — подписи, кнопки, «Читать далее»
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    "Accept": "text/html,application/xhtml+xml",
+}
+
+# === Метрики ===
+ARTICLE_FETCH_SECONDS = Histogram("article_fetch_seconds", "Загрузка и разбор страницы статьи")
+ARTICLE_BYTES = Counter("article_fetch_bytes_total", "Прочитано байт страниц статей")
+ARTICLE_RESULTS = Counter("article_fetch_total", "Предзагрузка статей по итогу", ["result"])
+
+SKIP_TAGS = {"script", "style", "noscript", "svg", "nav", "header", "footer", "aside", "form", "button", "iframe"}
+TEXT_TAGS = {"p", "h1", "h2", "h3", "li", "blockquote"}
+VOID_TAGS = {"br", "img", "hr", "meta", "link", "input", "source", "wbr", "area", "base", "col", "embed", "track"}
+
+
+class ArticleTextExtractor(HTMLParser):
+    """
+    Потоковый извлекатель текста: feed() можно вызывать по кускам страницы.
+    Берёт абзацы и заголовки, пропуская меню, скрипты и подвалы; абзацы внутри
+    <article>/<main> собираются отдельно и предпочитаются остальным.
+    """
+
+    def __init__(self, limit=ARTICLE_TEXT_LIMIT):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.skip_depth = 0
+        self.article_depth = 0
+        self.block = None          # текущий текстовый тег
+        self.buffer = []
+        self.article_parts = []
+        self.other_parts = []
+        self.article_length = 0
+        self.other_length = 0
+        self.description = ""
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            if tag == "meta":
+                attrs = dict(attrs)
+                if attrs.get("property") == "og:description" or attrs.get("name") == "description":
+                    self.description = self.description or (attrs.get("content") or "").strip()
+            return
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in ("article", "main"):
+            self.article_depth += 1
+        elif tag in TEXT_TAGS and not self.skip_depth and self.block is None:
+            self.block = tag
+            self.buffer = []
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(self.skip_depth - 1, 0)
+        elif tag in ("article", "main"):
+            self.article_depth = max(self.article_depth - 1, 0)
+        elif tag == self.block:
+            self._flush()
+
+    def handle_data(self, data):
+        if self.block is not None and not self.skip_depth:
+            self.buffer.append(data)
+
+    def _flush(self):
+        text = " ".join("".join(self.buffer).split())
+        is_heading = self.block in ("h1", "h2", "h3")
+        self.block = None
+        self.buffer = []
+        if not text or (len(text) < MIN_PARAGRAPH_LENGTH and not is_heading):
+            return
+        if self.article_depth:
+            self.article_parts.append(text)
+            self.article_length += len(text)
+        elif self.other_length < self.limit:
+            self.other_parts.append(text)
+            self.other_length += len(text)
+
+    @property
+    def done(self):
+        """Текста статьи уже хватает — дальше страницу можно не читать."""
+        return self.article_length >= self.limit
+
+    def text(self):
+        parts = self.article_parts if self.article_length >= MIN_PARAGRAPH_LENGTH * 3 else self.other_parts
+        text = "\n".join(parts) or self.description
+        if len(text) > self.limit:
+            text = text[:self.limit].rsplit(" ", 1)[0] + "…"
+        return text
+
+
+class ArticleCache:
+    """
+    LRU-кэш извлечённых текстов по URL. Неудачные загрузки (пустая строка) запоминаются
+    только на ARTICLE_FAILURE_TTL, чтобы разовый сбой не лишал статью текста навсегда.
+    """
+
+    def __init__(self, size=ARTICLE_CACHE_SIZE, failure_ttl=ARTICLE_FAILURE_TTL):
+        self.size = size
+        self.failure_ttl = failure_ttl
+        self._items = OrderedDict()   # url -> (текст, момент истечения или None)
+
+    def get(self, url):
+        item = self._items.get(url)
+        if item is None:
+            return None
+        text, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._items[url]
+            return None
+        self._items.move_to_end(url)
+        return text
+
+    def put(self, url, text):
+        expires_at = None if text else time.monotonic() + self.failure_ttl
+        self._items[url] = (text, expires_at)
+        self._items.move_to_end(url)
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+
+article_cache = ArticleCache()
+_fetch_slots = None
+
+
+async def _download_text(url):
+    session = get_http_session()
+    timeout = aiohttp.ClientTimeout(total=ARTICLE_TIMEOUT)
+    async with session.get(url, headers=HEADERS, timeout=timeout) as resp:
+        if resp.status != 200:
+            logger.warning(f"📄 {url} - статус {resp.status}, статья без текста", extra=sampled("article_fetch"))
+            return ""
+        if resp.content_type not in ("text/html", "application/xhtml+xml"):
+            return ""
+
+        try:
+            decoder = codecs.getincrementaldecoder(resp.charset or "utf-8")(errors="replace")
+        except LookupError:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        extractor = ArticleTextExtractor()
+        received = 0
+        # Разбираем по кускам по мере загрузки и бросаем чтение, как только текста хватило
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            received += len(chunk)
+            extractor.feed(decoder.decode(chunk))
+            if extractor.done or received >= ARTICLE_MAX_BYTES:
+                break
+        extractor.close()
+        ARTICLE_BYTES.inc(received)
+        return extractor.text()
+
+
+async def fetch_article_text(url):
+    """Урезанный основной текст статьи по URL ("" — если получить не удалось)."""
+    cached = article_cache.get(url)
+    if cached is not None:
+        ARTICLE_RESULTS.inc(result="cached")
+        return cached
+
+    global _fetch_slots
+    if _fetch_slots is None:
+        _fetch_slots = asyncio.Semaphore(ARTICLE_FETCH_CONCURRENCY)
+
+    async with _fetch_slots:
+        try:
+            with ARTICLE_FETCH_SECONDS.time():
+                text = await _download_text(url)
+        except Exception as e:
+            logger.warning(f"📄 Не удалось загрузить статью {url}: {e}")
+            text = ""
+
+    ARTICLE_RESULTS.inc(result="ok" if text else "empty")
+    if text:
+        logger.info(f"📄 {url} - извлечено {len(text)} символов текста", extra=sampled("article_fetch"))
+    article_cache.put(url, text)
+    return text
+
+
+async def prefetch_articles(urls):
+    """Загружает тексты нескольких статей параллельно. Возвращает {url: текст}."""
+    if not ARTICLE_PREFETCH:
+        return {}
+    texts = await asyncio.gather(*(fetch_article_text(url) for url in urls))
+    return dict(zip(urls, texts))
@@ -0,0 +1,174 @@
+# services/dedup.py
+"""
+Поиск почти-дубликатов новостей из разных источников по заголовкам.
+
+Заголовок нормализуется (нижний регистр, ё→е, без пунктуации и стоп-слов,
+слова урезаны до STEM_LENGTH символов — грубая замена стеммингу), затем
+по множеству слов считается MinHash-подпись. Кандидаты ищутся через LSH
+(подпись режется на полосы, совпадение любой полосы — кандидат) и
+проверяются точным коэффициентом Жаккара. Так проверка новой новости
+стоит O(1) в среднем, а не перебор всего окна.
+"""
+import os
+import time
+import hashlib
+import re
+from collections import defaultdict, deque
+from datetime import datetime, timedelta
+from sqlalchemy import select
+from database.models import News
+from logger.logger import logger
+
+# === Конфигурация ===
+DEDUP_WINDOW_HOURS = int(os.getenv("DEDUP_WINDOW_HOURS", 48))       # с какими новостями сравниваем
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.8))          # дубликат — сходство по Жаккару строго выше
+DEDUP_MIN_TOKENS = 3        # слишком короткие заголовки не сравниваем
+DEDUP_MIN_SHARED = 3        # и не считаем дубликатами заголовки с меньшим числом общих слов
+STEM_LENGTH = 6
+NUM_PERM = 32               # длина MinHash-подписи
+BANDS = 16                  # 16 полос по 2 значения: пара с J=0.8 становится кандидатом почти наверняка
+ROWS_PER_BAND = NUM_PERM // BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_PERMUTATIONS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME | 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % _MERSENNE_PRIME)
+    for i in range(NUM_PERM)
+]
+
+STOP_WORDS = {
+    "и", "в", "во", "на", "с", "со", "по", "к", "ко", "о", "об", "от", "для", "из", "за", "до",
+    "не", "что", "как", "а", "но", "или", "у", "же", "это", "его", "ее", "их", "при", "про",
+    "the", "a", "an", "of", "to", "in", "on", "for", "and", "or", "is", "with", "at", "by",
+}
+_WORD_RE = re.compile(r"[0-9a-zа-я]+")
+
+
+def title_tokens(title):
+    """Нормализованное множество слов заголовка."""
+    text = title.lower().replace("ё", "е")
+    return frozenset(
+        word[:STEM_LENGTH] for word in _WORD_RE.findall(text) if word not in STOP_WORDS
+    )
+
+
+def minhash_signature(tokens):
+    hashes = [int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), "big") for t in tokens]
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(left, right):
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+class NearDuplicateIndex:
+    """LSH-индекс заголовков за скользящее окно."""
+
+    def __init__(self, window_seconds=DEDUP_WINDOW_HOURS * 3600):
+        self.window_seconds = window_seconds
+        self.entries = {}                 # news_id -> множество слов
+        self.buckets = defaultdict(set)   # (полоса, значения) -> news_id
+        self.timeline = deque()           # (время, news_id, ключи полос) для вытеснения
+        self.loaded = False
+
+    @staticmethod
+    def _band_keys(signature):
+        return [
+            (band, signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])
+            for band in range(BANDS)
+        ]
+
+    def _evict(self, now):
+        border = now - self.window_seconds
+        while self.timeline and self.timeline[0][0] < border:
+            _, news_id, keys = self.timeline.popleft()
+            self.entries.pop(news_id, None)
+            for key in keys:
+                bucket = self.buckets.get(key)
+                if bucket is not None:
+                    bucket.discard(news_id)
+                    if not bucket:
+                        del self.buckets[key]
+
+    def _prepare(self, title):
+        """Слова заголовка и ключи полос LSH (None — заголовок слишком короткий для сравнения)."""
+        tokens = title_tokens(title)
+        if len(tokens) < DEDUP_MIN_TOKENS:
+            return tokens, None
+        return tokens, self._band_keys(minhash_signature(tokens))
+
+    def _match(self, tokens, keys):
+        match = None
+        best = DEDUP_THRESHOLD
+        candidates = set()
+        for key in keys:
+            candidates |= self.buckets.get(key, set())
+        for candidate in candidates:
+            other = self.entries[candidate]
+            if len(tokens & other) < DEDUP_MIN_SHARED:
+                continue
+            score = jaccard(tokens, other)
+            if score > best:
+                match, best = candidate, score
+        return match
+
+    def _add(self, news_id, tokens, keys, ts):
+        self.entries[news_id] = tokens
+        for key in keys:
+            self.buckets[key].add(news_id)
+        self.timeline.append((ts, news_id, keys))
+
+    def find(self, title):
+        """Возвращает id похожей новости из индекса или None, индекс не меняется."""
+        self._evict(time.time())
+        tokens, keys = self._prepare(title)
+        if keys is None:
+            return None
+        return self._match(tokens, keys)
+
+    def add(self, news_id, title, ts=None):
+        """Добавляет новость в индекс (вызывается после того, как она сохранена в БД)."""
+        tokens, keys = self._prepare(title)
+        if keys is not None:
+            self._add(news_id, tokens, keys, time.time() if ts is None else ts)
+
+    def check_and_add(self, news_id, title, ts=None):
+        """
+        Возвращает id ранее добавленной похожей новости или None.
+        Новость попадает в индекс в любом случае, чтобы ловить дальнейшие перепечатки.
+        """
+        ts = time.time() if ts is None else ts
+        self._evict(time.time())
+
+        tokens, keys = self._prepare(title)
+        if keys is None:
+            return None
+        match = self._match(tokens, keys)
+        self._add(news_id, tokens, keys, ts)
+        return match
+
+    async def ensure_loaded(self, session):
+        """Один раз за процесс заполняет окно заголовками из БД."""
+        if self.loaded:
+            return
+        border = datetime.utcnow() - timedelta(seconds=self.window_seconds)
+        result = await session.execute(
+            select(News.id, News.title, News.published_at)
+            .where(News.published_at >= border)
+            .order_by(News.published_at, News.id)
+        )
+        count = 0
+        offset = time.time() - datetime.utcnow().timestamp()  # naive UTC -> epoch
+        for news_id, title, published_at in result:
+            self.check_and_add(news_id, title, published_at.timestamp() + offset)
+            count += 1
+        self.loaded = True
+        logger.info(f"🧬 Индекс дубликатов заполнен: {count} новостей за {self.window_seconds // 3600} ч")
+
+
+near_duplicates = NearDuplicateIndex()
@@ -0,0 +1,81 @@
+# services/feed_cache.py
+import json
+import os
+import hashlib
+from pathlib import Path
+from logger.logger import logger
+
+# Файл кэша валидаторов; лежит в примонтированной папке, чтобы пережить рестарт контейнера
+CACHE_FILE = Path(os.getenv("RSS_CACHE_FILE", "cache/rss_validators.json"))
+
+
+def content_hash(body: bytes) -> str:
+    """Хеш тела ответа для обнаружения неизменившихся фидов."""
+    return hashlib.sha256(body).hexdigest()
+
+
+class FeedValidatorCache:
+    """Хранит ETag/Last-Modified, хеш тела и последние записи каждого RSS-фида."""
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = Path(path)
+        self._data = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._data = json.load(f)
+            logger.info(f"🗂 Кэш RSS загружен: {len(self._data)} фидов")
+        except FileNotFoundError:
+            self._data = {}
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось прочитать кэш RSS {self.path}: {e}")
+            self._data = {}
+
+    def conditional_headers(self, url):
+        """Заголовки If-None-Match / If-Modified-Since для условного GET."""
+        entry = self._data.get(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_unchanged(self, url, body_hash):
+        entry = self._data.get(url)
+        return bool(entry) and entry.get("hash") == body_hash
+
+    def cached_items(self, url):
+        entry = self._data.get(url) or {}
+        return list(entry.get("items", []))
+
+    def update(self, url, etag=None, last_modified=None, body_hash=None, items=None):
+        """Обновляет валидаторы фида; items/hash меняются только если переданы."""
+        entry = self._data.setdefault(url, {})
+        entry["etag"] = etag
+        entry["last_modified"] = last_modified
+        if body_hash is not None:
+            entry["hash"] = body_hash
+        if items is not None:
+            entry["items"] = items
+        self._dirty = True
+
+    def save(self):
+        """Атомарно сохраняет кэш на диск, если были изменения."""
+        if not self._dirty:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось сохранить кэш RSS {self.path}: {e}")
+
+
+feed_cache = FeedValidatorCache()
@@ -0,0 +1,91 @@
+# services/feed_poller.py
+import os
+import time
+import random
+from logger.logger import logger, sampled
+
+# === Конфигурация ===
+POLL_DEFAULT_SECONDS = int(os.getenv("POLL_DEFAULT_SECONDS", 11 * 60))  # стартовый интервал
+POLL_MIN_SECONDS = int(os.getenv("POLL_MIN_SECONDS", 2 * 60))
+POLL_MAX_SECONDS = int(os.getenv("POLL_MAX_SECONDS", 60 * 60))
+POLL_JITTER = 0.15           # ±15% к интервалу, чтобы фиды не синхронизировались
+POLL_SPEEDUP = 0.5           # множитель при появлении новых записей
+POLL_BACKOFF = 1.5           # множитель, если ничего нового (в т.ч. 304)
+POLL_MAX_ERROR_STEPS = 6     # 2^6 — потолок экспоненциального отката при ошибках
+RATE_SMOOTHING = 0.3         # вес нового замера в EWMA скорости публикаций
+TARGET_NEW_PER_POLL = 1.0    # к скольким новым записям за опрос стремимся
+
+
+def clamp_interval(seconds):
+    return max(POLL_MIN_SECONDS, min(POLL_MAX_SECONDS, seconds))
+
+
+class FeedPollState:
+    """Состояние опроса одного фида: текущий интервал, время следующего опроса, оценка скорости."""
+
+    def __init__(self, url, now):
+        self.url = url
+        self.interval = POLL_DEFAULT_SECONDS
+        # Первый опрос — сразу, но с разбросом, чтобы не бить во все фиды одновременно
+        self.next_poll_at = now + random.uniform(0, POLL_JITTER * POLL_DEFAULT_SECONDS)
+        self.last_poll_at = None
+        self.errors = 0
+        self.rate = 0.0  # новых записей в секунду (EWMA)
+
+    def learned_interval(self):
+        """Интервал, за который по оценке выходит TARGET_NEW_PER_POLL новых записей."""
+        if self.rate <= 0:
+            return POLL_MAX_SECONDS
+        return clamp_interval(TARGET_NEW_PER_POLL / self.rate)
+
+    def record(self, status, new_count, now):
+        if status == "error":
+            self.errors += 1
+            self.interval = clamp_interval(POLL_DEFAULT_SECONDS * 2 ** min(self.errors, POLL_MAX_ERROR_STEPS))
+        else:
+            self.errors = 0
+            if self.last_poll_at is not None:
+                elapsed = max(now - self.last_poll_at, 1.0)
+                self.rate = RATE_SMOOTHING * (new_count / elapsed) + (1 - RATE_SMOOTHING) * self.rate
+
+            learned = self.learned_interval()
+            if new_count:
+                self.interval = clamp_interval(min(self.interval * POLL_SPEEDUP, learned))
+            else:
+                self.interval = clamp_interval(min(self.interval * POLL_BACKOFF, 2 * learned))
+
+        self.last_poll_at = now
+        jitter = random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+        self.next_poll_at = now + self.interval * jitter
+
+
+class FeedPoller:
+    """Решает, какие фиды пора опрашивать, и подстраивает интервалы под их реальную активность."""
+
+    def __init__(self):
+        self.states = {}
+
+    def _state(self, url, now):
+        state = self.states.get(url)
+        if state is None:
+            state = self.states[url] = FeedPollState(url, now)
+        return state
+
+    def due_feeds(self, urls, now=None):
+        now = time.monotonic() if now is None else now
+        return [url for url in urls if self._state(url, now).next_poll_at <= now]
+
+    def record(self, results, now=None):
+        """Учитывает итоги опроса (список FeedFetchResult)."""
+        now = time.monotonic() if now is None else now
+        for result in results:
+            state = self._state(result.url, now)
+            state.record(result.status, result.new_count, now)
+            logger.info(
+                f"⏲ {result.url}: {result.status}, новых {result.new_count}, "
+                f"следующий опрос через {state.next_poll_at - now:.0f} сек",
+                extra=sampled("feed_poll"),
+            )
+
+
+feed_poller = FeedPoller()
@@ -0,0 +1,63 @@
+# services/feed_registry.py
+import os
+import time
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database.db import AsyncSessionLocal
+from database.models import Feed
+from logger.logger import logger
+
+# Как часто перечитывать список фидов из БД (сек)
+FEED_REGISTRY_TTL = int(os.getenv("FEED_REGISTRY_TTL", 5 * 60))
+
+
+class FeedRegistry:
+    """Список RSS-фидов из таблицы feeds (включённые, по убыванию приоритета) с кэшем в памяти."""
+
+    def __init__(self, ttl=FEED_REGISTRY_TTL):
+        self.ttl = ttl
+        self.urls = []
+        self.loaded_at = 0.0
+
+    async def _seed_defaults(self, session):
+        """Если в реестре нет ни одного RSS-фида, заносим встроенный список RSS_FEEDS."""
+        from services.rss_reader import RSS_FEEDS
+
+        count = await session.scalar(select(func.count()).select_from(Feed).where(Feed.type == "rss"))
+        if count:
+            return
+        await session.execute(
+            pg_insert(Feed)
+            .values([{"name": url, "url": url, "type": "rss"} for url in RSS_FEEDS])
+            .on_conflict_do_nothing(index_elements=["url"])
+        )
+        await session.commit()
+        logger.info(f"🗂 Реестр фидов пуст — добавлено {len(RSS_FEEDS)} фидов по умолчанию")
+
+    async def load(self):
+        async with AsyncSessionLocal() as session:
+            await self._seed_defaults(session)
+            result = await session.execute(
+                select(Feed.url)
+                .where(Feed.type == "rss", Feed.enabled.is_(True))
+                .order_by(Feed.priority.desc(), Feed.id)
+            )
+            self.urls = result.scalars().all()
+        self.loaded_at = time.monotonic()
+        logger.info(f"🗂 Реестр фидов загружен: {len(self.urls)} включённых")
+        return self.urls
+
+    async def get_urls(self):
+        """Включённые фиды в порядке приоритета. При недоступной БД — последний известный список."""
+        if not self.urls or time.monotonic() - self.loaded_at >= self.ttl:
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"💥 Не удалось загрузить реестр фидов: {e}")
+                if not self.urls:
+                    from services.rss_reader import RSS_FEEDS
+                    return list(RSS_FEEDS)
+        return self.urls
+
+
+feed_registry = FeedRegistry()
@@ -1,9 +1,49 @@
 # services/gigachat.py
+import os
+import re
 import json
-import requests
-from logger.logger import logger
-
-PROXY_HOST = "http://10.63.0.110:8000"
+import math
+import time
+import asyncio
+from collections import deque
+import aiohttp
+from logger.logger import logger, sampled
+from services.http_client import get_http_session
+from services.metrics import Counter, Histogram
+
+PROXY_HOST = os.getenv("GIGACHAT_PROXY_HOST", "http://10.63.0.110:8000")
+
+TOKEN_TIMEOUT = 5              # таймаут запроса токена (сек)
+COMPLETION_TIMEOUT = 90        # таймаут генерации (сек)
+TOKEN_TTL_FALLBACK = 25 * 60   # если прокси не вернул expires_at (токен GigaChat живёт 30 минут)
+TOKEN_REFRESH_MARGIN = 60      # обновляем токен заранее, за минуту до истечения
+
+# Пакетный режим: несколько статей в одном запросе, инструкции и примеры отправляются один раз
+GIGACHAT_BATCH_MAX = int(os.getenv("GIGACHAT_BATCH_MAX", 5))   # 1 — пакетный режим выключен
+BATCH_TIMEOUT_FACTOR = 0.5     # +50% к таймауту генерации за каждую статью сверх первой
+MIN_PART_LENGTH = 80           # короче — часть пакетного ответа считается битой
+BATCH_ARTICLE_CHARS = 1500     # сколько текста статьи класть в пакетный промт на одну статью
+
+# Потоковый режим: ответ читается по мере генерации, заглушки обрываются в самом начале
+GIGACHAT_STREAM = os.getenv("GIGACHAT_STREAM", "true").lower() == "true"
+STREAM_IDLE_TIMEOUT = 30       # сколько ждать следующий фрагмент ответа (сек)
+EARLY_ABORT_CHARS = 600        # заглушку видно в начале ответа, дальше текст не проверяем
+
+# Признаки ответа-заглушки: пост «источник недоступен» по промту и типовые отказы модели
+STUB_MARKERS = (
+    "не удалось найти достоверную информацию",
+    "#источникнедоступен",
+    "что-то в вашем вопросе меня смущает",
+    "не люблю менять тему разговора",
+)
+
+# === Метрики ===
+LLM_SECONDS = Histogram("gigachat_request_seconds", "Длительность запроса к GigaChat", ["outcome"])
+LLM_TOKEN_REFRESHES = Counter("gigachat_token_refreshes_total", "Получено новых access_token")
+LLM_FAILURES = Counter("gigachat_failures_total", "Неудачные запросы к GigaChat", ["reason"])
+LLM_TTFT_SECONDS = Histogram("gigachat_time_to_first_token_seconds", "Время до первого фрагмента ответа GigaChat")
+LLM_EARLY_ABORTS = Counter("gigachat_early_aborts_total", "Потоковые ответы, оборванные из-за заглушки")
+LLM_BATCH_PARTS = Counter("gigachat_batch_parts_total", "Статьи в пакетных запросах по итогу разбора", ["result"])
 
 PROMPT_TEMPLATE = """
 Ты — опытный игровой журналист. На вход ты получаешь ссылку на сайт или текст статьи.
@@ -80,67 +120,351 @@ PROMPT_TEMPLATE = """
 ---
 """
 
+ARTICLE_PROMPT_SECTION = """
+Текст статьи (получен со страницы по ссылке, может быть сокращён). Опирайся на него,
+искать материал по ссылке не нужно:
+---
+{article_text}
+---
+"""
 
-def get_gigachat_token():
-    """Получаем access_token у прокси."""
-    try:
-        logger.debug("🔑 Запрашиваем токен у GigaChat-прокси...")
-        resp = requests.post(f"{PROXY_HOST}/oauth/", timeout=5)
-        resp.raise_for_status()
-        token = resp.json().get("access_token")
-        if not token:
-            raise ValueError("Прокси не вернул access_token")
-        logger.debug("✅ Токен успешно получен.")
-        return token
-    except Exception as e:
-        logger.error(f"💥 Ошибка получения токена: {e}")
-        raise
+BATCH_PROMPT_TEMPLATE = """
+{instructions}
 
+Сейчас на входе сразу несколько статей ({count}). Подготовь заметку для КАЖДОЙ статьи
+по правилам выше, независимо от остальных, с её собственной ссылкой на источник.
+Каждую заметку оберни в маркеры с номером статьи из списка и ничего не пиши вне маркеров:
 
-def generate_gigachat_summary(url_or_text):
-    """Отправка запроса в GigaChat и получение готовой новости с детализированным логированием."""
-    try:
-        token = get_gigachat_token()
+<<<НОВОСТЬ 1>>>
+Ссылка на источник: ...
+Заголовок: ...
+Текст: ...
+Теги: ...
+<<<КОНЕЦ 1>>>
+
+Статьи:
+{articles}
+"""
+
+BATCH_PART_RE = re.compile(r"<<<НОВОСТЬ (\d+)>>>\s*(.*?)\s*<<<КОНЕЦ \1>>>", re.S)
+
+
+class StubReplyError(ValueError):
+    """Модель начала отвечать заглушкой — генерация прервана."""
+
+
+def stub_marker(text):
+    """Признак заглушки, найденный в тексте ответа, или None."""
+    lowered = text.lower()
+    return next((marker for marker in STUB_MARKERS if marker in lowered), None)
+
+
+def is_stub_reply(text):
+    """Ответ непригоден для публикации: наша заглушка об ошибке (⚠️ ...) или заглушка модели."""
+    text = (text or "").strip()
+    return text.startswith("⚠️") or stub_marker(text[:EARLY_ABORT_CHARS]) is not None
+
+
+class GigaChatClient:
+    """Асинхронный клиент GigaChat-прокси: общая сессия с keep-alive и кэш токена."""
+
+    def __init__(self, base_url=PROXY_HOST):
+        self.base_url = base_url
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+
+        # Статистика вызовов
+        self.latencies = deque(maxlen=200)
+        self.first_token_latencies = deque(maxlen=200)
+        self.early_aborts = 0
+        self.calls = 0
+        self.failures = 0
+        self.token_refreshes = 0
+
+    def _get_session(self):
+        return get_http_session()
+
+    async def get_token(self, stale_token=None):
+        """
+        Возвращает закэшированный access_token, при необходимости запрашивает новый.
+        stale_token — токен, на который сервер ответил 401: обновляем, только если его ещё не заменили.
+        """
+        async with self._token_lock:
+            still_valid = self._token and time.time() < self._token_expires_at - TOKEN_REFRESH_MARGIN
+            if still_valid and (stale_token is None or stale_token != self._token):
+                return self._token
+
+            logger.debug("🔑 Запрашиваем токен у GigaChat-прокси...")
+            session = self._get_session()
+            timeout = aiohttp.ClientTimeout(total=TOKEN_TIMEOUT)
+            async with session.post(f"{self.base_url}/oauth/", timeout=timeout) as resp:
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)
+
+            token = data.get("access_token")
+            if not token:
+                raise ValueError("Прокси не вернул access_token")
+
+            # expires_at у GigaChat приходит в миллисекундах
+            expires_at = data.get("expires_at")
+            if expires_at:
+                self._token_expires_at = float(expires_at) / 1000
+            else:
+                self._token_expires_at = time.time() + TOKEN_TTL_FALLBACK
+
+            self._token = token
+            self.token_refreshes += 1
+            LLM_TOKEN_REFRESHES.inc()
+            logger.debug("✅ Токен успешно получен.")
+            return token
+
+    async def _post_completion(self, token, payload, timeout_seconds, started, abort_on_stub):
+        """(статус, текст ответа модели или тело ошибки)."""
+        session = self._get_session()
         headers = {
             "Authorization": f"Bearer {token}",
             "Content-Type": "application/json",
         }
-
-        prompt = PROMPT_TEMPLATE.format(url_or_text=url_or_text)
+        # В потоке дополнительно ограничиваем паузу между фрагментами, а не только общее время
+        idle_timeout = STREAM_IDLE_TIMEOUT if payload["stream"] else None
+        timeout = aiohttp.ClientTimeout(total=timeout_seconds, sock_read=idle_timeout)
+        async with session.post(
+            f"{self.base_url}/chat/completions", headers=headers, json=payload, timeout=timeout
+        ) as resp:
+            if resp.status != 200:
+                return resp.status, await resp.text()
+            if resp.content_type != "text/event-stream":
+                # Обычный ответ целиком (stream выключен или прокси не отдаёт поток)
+                data = json.loads(await resp.text())
+                return resp.status, data["choices"][0]["message"]["content"]
+            return resp.status, await self._read_stream(resp, started, abort_on_stub)
+
+    async def _read_stream(self, resp, started, abort_on_stub):
+        """
+        Собирает ответ из SSE-фрагментов (data: {...}, в конце data: [DONE]).
+        Если начало ответа — заглушка, выходит из запроса: соединение закрывается и генерация прерывается.
+        """
+        parts = []
+        length = 0
+        async for raw_line in resp.content:
+            line = raw_line.decode("utf-8", "replace").strip()
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            choices = json.loads(data).get("choices") or []
+            delta = (choices[0].get("delta") or {}).get("content") if choices else None
+            if not delta:
+                continue
+            if not parts:
+                ttft = time.perf_counter() - started
+                self.first_token_latencies.append(ttft)
+                LLM_TTFT_SECONDS.observe(ttft)
+            parts.append(delta)
+
+            if abort_on_stub and length < EARLY_ABORT_CHARS:
+                length += len(delta)
+                marker = stub_marker("".join(parts))
+                if marker:
+                    self.early_aborts += 1
+                    LLM_EARLY_ABORTS.inc()
+                    raise StubReplyError(f"ответ-заглушка ({marker}), прервано на {length} символах")
+        return "".join(parts)
+
+    async def complete(self, prompt, timeout_seconds=COMPLETION_TIMEOUT, abort_on_stub=False):
+        """
+        Отправляет промт и возвращает текст ответа. При 401 один раз обновляет токен.
+        abort_on_stub — в потоковом режиме обрывать генерацию, как только видно заглушку (StubReplyError).
+        """
         payload = {
             "model": "GigaChat",
             "messages": [{"role": "user", "content": prompt}],
-            "stream": False,
+            "stream": GIGACHAT_STREAM,
             "repetition_penalty": 1,
         }
 
+        self.calls += 1
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            token = await self.get_token()
+            status, body = await self._post_completion(token, payload, timeout_seconds, started, abort_on_stub)
+
+            if status == 401:
+                logger.warning("🔑 GigaChat вернул 401, обновляем токен и повторяем запрос")
+                token = await self.get_token(stale_token=token)
+                status, body = await self._post_completion(token, payload, timeout_seconds, started, abort_on_stub)
+
+            if status != 200:
+                logger.debug(f"📦 Ответ сервера при ошибке: {body[:1000]}")
+                raise RuntimeError(f"GigaChat вернул статус {status}")
+
+            outcome = "ok"
+            return body
+        except StubReplyError:
+            outcome = "stub"
+            self.failures += 1
+            LLM_FAILURES.inc(reason="stub")
+            raise
+        except Exception as e:
+            self.failures += 1
+            LLM_FAILURES.inc(reason="timeout" if isinstance(e, asyncio.TimeoutError) else type(e).__name__)
+            raise
+        finally:
+            latency = time.perf_counter() - started
+            self.latencies.append(latency)
+            LLM_SECONDS.observe(latency, outcome=outcome)
+
+    def latency_stats(self):
+        """Сводка по задержкам последних вызовов (в секундах)."""
+        values = sorted(self.latencies)
+        if not values:
+            return {"calls": self.calls, "failures": self.failures, "token_refreshes": self.token_refreshes}
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "token_refreshes": self.token_refreshes,
+            "last": self.latencies[-1],
+            "avg": sum(values) / len(values),
+            "p50": values[len(values) // 2],
+            "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+            "ttft_p50": sorted(self.first_token_latencies)[len(self.first_token_latencies) // 2]
+            if self.first_token_latencies else None,
+            "early_aborts": self.early_aborts,
+        }
+
+gigachat_client = GigaChatClient()
+
+
+async def get_gigachat_token():
+    """Получаем access_token у прокси (из кэша, если он ещё действителен)."""
+    try:
+        return await gigachat_client.get_token()
+    except Exception as e:
+        logger.error(f"💥 Ошибка получения токена: {e}")
+        raise
+
+
+async def generate_gigachat_summary(url_or_text, article_text=None):
+    """Отправка запроса в GigaChat и получение готовой новости с детализированным логированием."""
+    try:
+        prompt = build_prompt(url_or_text, article_text)
+
         # Логируем отправляемый промт (в разумных пределах)
         trimmed_prompt = prompt[:600] + ("…" if len(prompt) > 600 else "")
-        logger.debug(f"➡️ Отправляем запрос в GigaChat для URL: {url_or_text}\n---PROMPT START---\n{trimmed_prompt}\n---PROMPT END---")
-
-        resp = requests.post(f"{PROXY_HOST}/chat/completions", headers=headers, json=payload, timeout=90)
-        resp.raise_for_status()
+        logger.debug(
+            f"➡️ Отправляем запрос в GigaChat для URL: {url_or_text}\n---PROMPT START---\n{trimmed_prompt}\n---PROMPT END---",
+            extra=sampled("gigachat_dump"),
+        )
 
-        data = resp.json()
-        reply = data["choices"][0]["message"]["content"]
+        reply = await gigachat_client.complete(prompt, abort_on_stub=True)
 
         # Урезаем длинный ответ для читаемости логов
         trimmed_reply = reply[:600] + ("…" if len(reply) > 600 else "")
-        logger.debug(f"⬅️ Ответ GigaChat для URL: {url_or_text}\n---REPLY START---\n{trimmed_reply}\n---REPLY END---")
+        logger.debug(
+            f"⬅️ Ответ GigaChat для URL: {url_or_text}\n---REPLY START---\n{trimmed_reply}\n---REPLY END---",
+            extra=sampled("gigachat_dump"),
+        )
 
-        logger.info(f"✨ Ответ получен от GigaChat ({len(reply)} символов).")
+        latency = gigachat_client.latencies[-1]
+        logger.info(f"✨ Ответ получен от GigaChat ({len(reply)} символов) за {latency:.1f} с.")
         return reply
 
-    except requests.Timeout:
+    except StubReplyError as e:
+        logger.warning(f"🛑 GigaChat начал отвечать заглушкой для {url_or_text}: {e}")
+        return f"⚠️ Модель не нашла материал по ссылке. Источник: {url_or_text}"
+    except asyncio.TimeoutError:
         logger.error(f"⏰ Таймаут при обращении к GigaChat для {url_or_text}")
         return f"⚠️ Сервер GigaChat не ответил вовремя. Источник: {url_or_text}"
     except Exception as e:
-        # Сохраняем с деталями JSON для последующей диагностики
-        try:
-            debug_data = json.dumps(resp.json(), ensure_ascii=False, indent=2)[:1000]
-            logger.debug(f"📦 Ответ сервера при ошибке: {debug_data}")
-        except Exception:
-            pass
-
         logger.error(f"💥 Ошибка во время общения с GigaChat для {url_or_text}: {e}")
         return f"⚠️ Ошибка генерации новости\n{url_or_text}"
+
+
+def gigachat_stats():
+    """Статистика клиента GigaChat: вызовы, ошибки, обновления токена, задержки."""
+    return gigachat_client.latency_stats()
+
+
+def build_prompt(url, article_text=None):
+    """Промт для одной статьи: ссылка и, если удалось скачать, её текст."""
+    prompt = PROMPT_TEMPLATE.format(url_or_text=url)
+    if article_text:
+        prompt += ARTICLE_PROMPT_SECTION.format(article_text=article_text)
+    return prompt
+
+
+# === Пакетный режим ===
+def batch_size_for(backlog, workers=1):
+    """
+    Размер пакета по глубине очереди: пока новостей не больше, чем воркеров, —
+    по одной статье (минимальная задержка), дальше пакеты растут до GIGACHAT_BATCH_MAX.
+    """
+    if GIGACHAT_BATCH_MAX <= 1 or backlog <= workers:
+        return 1
+    return min(GIGACHAT_BATCH_MAX, math.ceil(backlog / workers))
+
+
+def build_batch_prompt(urls, article_texts=None):
+    instructions = PROMPT_TEMPLATE.format(url_or_text="(ссылка на соответствующую статью)")
+    article_texts = article_texts or {}
+    articles = []
+    for number, url in enumerate(urls, 1):
+        articles.append(f"{number}. {url}")
+        text = (article_texts.get(url) or "")[:BATCH_ARTICLE_CHARS]
+        if text:
+            articles.append(f"Текст статьи {number}: {' '.join(text.split())}")
+    articles = "\n".join(articles)
+    return BATCH_PROMPT_TEMPLATE.format(instructions=instructions, count=len(urls), articles=articles)
+
+
+def parse_batch_reply(reply, urls):
+    """
+    Разбирает пакетный ответ на {url: текст}. Часть принимается, только если номер есть в списке,
+    текст не короче MIN_PART_LENGTH, не заглушка и содержит ссылку своей статьи (защита от перепутанных частей).
+    """
+    parts = {}
+    for match in BATCH_PART_RE.finditer(reply):
+        index = int(match.group(1)) - 1
+        text = match.group(2).strip()
+        if not 0 <= index < len(urls) or urls[index] in parts:
+            continue
+        url = urls[index]
+        # Ссылка должна стоять целиком: .../news/1 не должна совпасть с .../news/12
+        mentions_url = re.search(re.escape(url.rstrip("/")) + r"/?(?![\w/-]|\.\w)", text)
+        if len(text) >= MIN_PART_LENGTH and mentions_url and not is_stub_reply(text):
+            parts[url] = text
+    return parts
+
+
+async def generate_gigachat_batch(urls, article_texts=None):
+    """
+    Готовит заметки для нескольких статей одним запросом. Возвращает {url: текст} только
+    для частей, прошедших проверку (при ошибке запроса — пустой словарь); остальные статьи
+    вызывающий код догенерирует по одной, каждую в своём слоте воркера.
+    article_texts — {url: текст статьи} из предзагрузки, если есть.
+    """
+    urls = list(dict.fromkeys(urls))
+    article_texts = article_texts or {}
+
+    parts = {}
+    try:
+        timeout = COMPLETION_TIMEOUT * (1 + BATCH_TIMEOUT_FACTOR * (len(urls) - 1))
+        reply = await gigachat_client.complete(build_batch_prompt(urls, article_texts), timeout_seconds=timeout)
+        parts = parse_batch_reply(reply, urls)
+        latency = gigachat_client.latencies[-1]
+        logger.info(f"📚 Пакетный ответ GigaChat: {len(parts)} из {len(urls)} статей за {latency:.1f} с.")
+    except asyncio.TimeoutError:
+        logger.error(f"⏰ Таймаут пакетного запроса к GigaChat ({len(urls)} статей)")
+    except Exception as e:
+        logger.error(f"💥 Ошибка пакетного запроса к GigaChat ({len(urls)} статей): {e}")
+
+    missing = len(urls) - len(parts)
+    LLM_BATCH_PARTS.inc(len(parts), result="ok")
+    LLM_BATCH_PARTS.inc(missing, result="fallback")
+    if missing:
+        logger.warning(f"🔁 {missing} статей из пакета уйдут в LLM по одной")
+    return parts
@@ -0,0 +1,87 @@
+# services/http_client.py
+import os
+import aiohttp
+from logger.logger import logger
+
+# === Настройки общего пула соединений ===
+HTTP_POOL_LIMIT = int(os.getenv("HTTP_POOL_LIMIT", 100))
+HTTP_POOL_LIMIT_PER_HOST = int(os.getenv("HTTP_POOL_LIMIT_PER_HOST", 10))
+HTTP_DNS_CACHE_TTL = int(os.getenv("HTTP_DNS_CACHE_TTL", 300))    # сек
+HTTP_KEEPALIVE_TIMEOUT = int(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 60))  # сек
+
+_session = None
+
+# Статистика переиспользования соединений
+http_stats_counters = {
+    "requests": 0,
+    "connections_created": 0,
+    "connections_reused": 0,
+    "dns_resolutions": 0,
+    "dns_cache_hits": 0,
+}
+
+
+def _build_trace_config():
+    trace = aiohttp.TraceConfig()
+
+    async def on_request_start(session, ctx, params):
+        http_stats_counters["requests"] += 1
+
+    async def on_connection_create_end(session, ctx, params):
+        http_stats_counters["connections_created"] += 1
+
+    async def on_connection_reuseconn(session, ctx, params):
+        http_stats_counters["connections_reused"] += 1
+
+    async def on_dns_resolvehost_end(session, ctx, params):
+        http_stats_counters["dns_resolutions"] += 1
+
+    async def on_dns_cache_hit(session, ctx, params):
+        http_stats_counters["dns_cache_hits"] += 1
+
+    trace.on_request_start.append(on_request_start)
+    trace.on_connection_create_end.append(on_connection_create_end)
+    trace.on_connection_reuseconn.append(on_connection_reuseconn)
+    trace.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+    trace.on_dns_cache_hit.append(on_dns_cache_hit)
+    return trace
+
+
+def get_http_session():
+    """Общая HTTP-сессия приложения (RSS, GigaChat и прочие исходящие запросы)."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        )
+        _session = aiohttp.ClientSession(connector=connector, trace_configs=[_build_trace_config()])
+        logger.info(
+            f"🌐 HTTP-клиент создан: пул {HTTP_POOL_LIMIT}, на хост {HTTP_POOL_LIMIT_PER_HOST}, "
+            f"DNS-кэш {HTTP_DNS_CACHE_TTL} сек, keep-alive {HTTP_KEEPALIVE_TIMEOUT} сек"
+        )
+    return _session
+
+
+async def start_http_client():
+    """Создаёт общую сессию при старте бота."""
+    return get_http_session()
+
+
+def http_stats():
+    """Счётчики запросов, новых и переиспользованных соединений, обращений к DNS."""
+    stats = dict(http_stats_counters)
+    connections = stats["connections_created"] + stats["connections_reused"]
+    stats["reuse_ratio"] = stats["connections_reused"] / connections if connections else 0.0
+    return stats
+
+
+async def close_http_session():
+    """Закрывает общую сессию при выключении бота."""
+    global _session
+    if _session is not None and not _session.closed:
+        logger.info(f"🌐 Статистика HTTP-клиента: {http_stats()}")
+        await _session.close()
+    _session = None
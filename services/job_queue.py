@@ -0,0 +1,255 @@
+# services/job_queue.py
+"""
+Очередь публикации поверх news_outbox для нескольких экземпляров бота.
+
+Воркер забирает пачку через FOR UPDATE SKIP LOCKED и получает аренду (lease)
+на LEASE_SECONDS. Перед отправкой аренда продлевается: если её уже забрал
+другой воркер, новость не отправляется. Завершение идемпотентно — строка
+закрывается только владельцем аренды, SentNews пишется в той же транзакции.
+Зависшие аренды (упавший контейнер) возвращаются в pending.
+
+Рассылка подписчикам после публикации отмечается флагом fanout_pending и идёт
+под той же арендой; прерванную (рестарт, сбои отправки) забирает claim_fanouts,
+когда аренда свободна или истекла.
+"""
+import os
+import socket
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, case, func
+from database.db import AsyncSessionLocal
+from database.models import News, SentNews, NewsOutbox
+from logger.logger import logger
+
+# === Конфигурация ===
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", 50))      # новостей за одну выборку из очереди
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 5))   # циклов до статуса failed
+LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 15 * 60))  # хватает на все ретраи LLM
+FANOUT_RESUME_BATCH = int(os.getenv("FANOUT_RESUME_BATCH", 10))    # прерванных рассылок за один проход
+FANOUT_MAX_AGE_HOURS = int(os.getenv("FANOUT_MAX_AGE_HOURS", 24))  # старше — рассылку не продолжаем
+FANOUT_RESUME_SECONDS = int(os.getenv("FANOUT_RESUME_SECONDS", 10 * 60))  # пауза перед повтором недоставленным
+
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}"
+
+
+def db_utcnow():
+    """Текущее время UTC по часам БД, чтобы аренды не зависели от часов контейнеров."""
+    return func.timezone("UTC", func.now())
+
+
+def lease_deadline():
+    return db_utcnow() + func.make_interval(0, 0, 0, 0, 0, 0, float(LEASE_SECONDS))
+
+
+async def pending_count():
+    """Сколько новостей ждёт публикации (для метрики очереди)."""
+    async with AsyncSessionLocal() as session:
+        return await session.scalar(
+            select(func.count()).select_from(NewsOutbox).where(NewsOutbox.status == "pending")
+        )
+
+
+async def release_expired_leases():
+    """Возвращает в очередь новости, аренда которых истекла."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(NewsOutbox)
+            .where(NewsOutbox.status == "processing", NewsOutbox.locked_until < db_utcnow())
+            .values(status="pending", locked_by=None, locked_until=None)
+        )
+        await session.commit()
+
+    if result.rowcount:
+        logger.warning(f"⏱ Возвращено в очередь {result.rowcount} новостей с истекшей арендой")
+    return result.rowcount
+
+
+async def claim_batch(after_id):
+    """Забирает следующую пачку ожидающих новостей (keyset по id) и возвращает [(outbox_id, News)]."""
+    async with AsyncSessionLocal() as session:
+        candidates = (
+            select(NewsOutbox.id)
+            .where(NewsOutbox.status == "pending", NewsOutbox.id > after_id)
+            .order_by(NewsOutbox.id)
+            .limit(OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = await session.execute(
+            update(NewsOutbox)
+            .where(NewsOutbox.id.in_(candidates))
+            .values(
+                status="processing",
+                locked_by=WORKER_ID,
+                locked_until=lease_deadline(),
+                updated_at=datetime.utcnow(),
+            )
+            .returning(NewsOutbox.id)
+        )
+        claimed_ids = claimed.scalars().all()
+        await session.commit()
+
+        if not claimed_ids:
+            return []
+
+        result = await session.execute(
+            select(NewsOutbox.id, News)
+            .join(News, News.id == NewsOutbox.news_id)
+            .where(NewsOutbox.id.in_(claimed_ids))
+            .order_by(NewsOutbox.id)
+        )
+        return result.all()
+
+
+async def renew_lease(news):
+    """
+    Продлевает аренду перед отправкой. Возвращает множество целей, уже получивших новость
+    в прошлых циклах (см. fail_job), или None — новость уже принадлежит другому воркеру.
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(NewsOutbox)
+            .where(
+                NewsOutbox.news_id == news.id,
+                NewsOutbox.status == "processing",
+                NewsOutbox.locked_by == WORKER_ID,
+            )
+            .values(locked_until=lease_deadline())
+            .returning(NewsOutbox.delivered_targets)
+        )
+        row = result.first()
+        await session.commit()
+    if row is None:
+        return None
+    return frozenset(filter(None, (row[0] or "").split(",")))
+
+
+async def complete_job(news, fanout=False):
+    """
+    Закрывает новость как отправленную; повторный вызов ничего не меняет.
+    fanout=True — впереди рассылка подписчикам: аренда остаётся за этим воркером
+    и продлевается, пока рассылка идёт (см. renew_fanout_lease, finish_fanout).
+    """
+    async with AsyncSessionLocal() as session:
+        now = datetime.utcnow()
+        result = await session.execute(
+            update(NewsOutbox)
+            .where(NewsOutbox.news_id == news.id, NewsOutbox.locked_by == WORKER_ID)
+            .where(NewsOutbox.status == "processing")
+            .values(
+                status="sent",
+                attempts=NewsOutbox.attempts + 1,
+                fanout_pending=fanout,
+                locked_by=WORKER_ID if fanout else None,
+                locked_until=lease_deadline() if fanout else None,
+                updated_at=now,
+            )
+        )
+        if result.rowcount:
+            session.add(SentNews(user_id=None, news_id=news.id, sent_at=now))
+        await session.commit()
+    return result.rowcount == 1
+
+
+async def renew_fanout_lease(news):
+    """Продлевает аренду рассылки. False — её уже забрал другой воркер."""
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(NewsOutbox)
+            .where(
+                NewsOutbox.news_id == news.id,
+                NewsOutbox.fanout_pending,
+                NewsOutbox.locked_by == WORKER_ID,
+            )
+            .values(locked_until=lease_deadline())
+        )
+        await session.commit()
+    return result.rowcount == 1
+
+
+async def finish_fanout(news, done):
+    """
+    Закрывает проход рассылки. done=False оставляет её в очереди: продолжить её можно
+    не раньше чем через FANOUT_RESUME_SECONDS, чтобы сбойные чаты не долбились каждый цикл.
+    """
+    if done:
+        values = dict(fanout_pending=False, locked_by=None, locked_until=None)
+    else:
+        values = dict(
+            locked_by=None,
+            locked_until=db_utcnow() + func.make_interval(0, 0, 0, 0, 0, 0, float(FANOUT_RESUME_SECONDS)),
+        )
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(NewsOutbox)
+            .where(NewsOutbox.news_id == news.id, NewsOutbox.locked_by == WORKER_ID)
+            .values(**values)
+        )
+        await session.commit()
+
+
+async def claim_fanouts(limit=FANOUT_RESUME_BATCH):
+    """
+    Забирает прерванные рассылки со свободной или истекшей арендой и возвращает их [News].
+    Рассылки старше FANOUT_MAX_AGE_HOURS закрываются без продолжения — новость уже неактуальна.
+    """
+    lease_free = (NewsOutbox.locked_until.is_(None)) | (NewsOutbox.locked_until < db_utcnow())
+    async with AsyncSessionLocal() as session:
+        expired = await session.execute(
+            update(NewsOutbox)
+            .where(
+                NewsOutbox.fanout_pending,
+                NewsOutbox.updated_at < datetime.utcnow() - timedelta(hours=FANOUT_MAX_AGE_HOURS),
+                lease_free,
+            )
+            .values(fanout_pending=False, locked_by=None, locked_until=None)
+        )
+        if expired.rowcount:
+            logger.warning(f"📭 Закрыто {expired.rowcount} устаревших незавершённых рассылок")
+
+        candidates = (
+            select(NewsOutbox.id)
+            .where(NewsOutbox.fanout_pending, NewsOutbox.status == "sent", lease_free)
+            .order_by(NewsOutbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        claimed = await session.execute(
+            update(NewsOutbox)
+            .where(NewsOutbox.id.in_(candidates))
+            .values(locked_by=WORKER_ID, locked_until=lease_deadline())
+            .returning(NewsOutbox.news_id)
+        )
+        news_ids = claimed.scalars().all()
+        await session.commit()
+
+        if not news_ids:
+            return []
+        result = await session.execute(select(News).where(News.id.in_(news_ids)).order_by(News.id))
+        return result.scalars().all()
+
+
+async def fail_job(news, delivered_targets=None):
+    """
+    Учитывает неудачный цикл и снимает аренду; после OUTBOX_MAX_ATTEMPTS новость выходит из очереди.
+    delivered_targets — цели, которые новость уже получила: следующий цикл отправит только в остальные.
+    """
+    async with AsyncSessionLocal() as session:
+        attempts = NewsOutbox.attempts + 1
+        values = dict(
+            attempts=attempts,
+            status=case((attempts >= OUTBOX_MAX_ATTEMPTS, "failed"), else_="pending"),
+            locked_by=None,
+            locked_until=None,
+            updated_at=datetime.utcnow(),
+        )
+        if delivered_targets:
+            values["delivered_targets"] = ",".join(sorted(delivered_targets))
+        await session.execute(
+            update(NewsOutbox)
+            .where(
+                NewsOutbox.news_id == news.id,
+                NewsOutbox.status == "processing",
+                NewsOutbox.locked_by == WORKER_ID,
+            )
+            .values(**values)
+        )
+        await session.commit()
@@ -0,0 +1,69 @@
+# services/latest_cache.py
+import os
+import time
+import asyncio
+from logger.logger import logger
+
+# Сколько секунд снимок считается свежим без тиков приёма. Пока планировщик работает,
+# каждый тик продлевает свежесть (фиды опрашиваются по своим интервалам), и /latest сам
+# фиды не скачивает; фоновое обновление нужно экземплярам без планировщика или при его сбое.
+LATEST_CACHE_TTL = int(os.getenv("LATEST_CACHE_TTL", 15 * 60))
+
+
+class LatestNewsCache:
+    """Последние новости в памяти: заполняется этапом приёма, читается командой /latest."""
+
+    def __init__(self, ttl=LATEST_CACHE_TTL):
+        self.ttl = ttl
+        self.items = []
+        self._by_source = {}
+        self.updated_at = 0.0
+        self._refresh_task = None
+
+    def update(self, items):
+        """
+        Обновляет снимок по источникам из items; остальные источники остаются как были
+        (за тик опрашиваются не все фиды). Свежие публикации идут первыми.
+        """
+        by_source = {}
+        for item in items:
+            by_source.setdefault(item["source"], []).append(item)
+        self._by_source.update(by_source)
+
+        merged = [item for source_items in self._by_source.values() for item in source_items]
+        self.items = sorted(merged, key=lambda item: item.get("published") or "", reverse=True)
+        self.updated_at = time.monotonic()
+
+    def touch(self):
+        """Тик приёма прошёл: снимок актуален, даже если фидам ещё рано в опрос."""
+        if self.items:
+            self.updated_at = time.monotonic()
+
+    def is_fresh(self):
+        return bool(self.items) and time.monotonic() - self.updated_at < self.ttl
+
+    def get(self):
+        """Возвращает снимок мгновенно; если он устарел — обновляет его в фоне."""
+        if not self.is_fresh():
+            self._schedule_refresh()
+        return self.items
+
+    def _schedule_refresh(self):
+        # Одновременные запросы не порождают пачку загрузок: фоновое обновление одно
+        if self._refresh_task is not None and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+
+    async def _refresh(self):
+        from services.rss_reader import get_all_rss_news
+
+        logger.info("🔄 Кэш /latest устарел, обновляем в фоне")
+        try:
+            items = await get_all_rss_news()
+            if items:
+                self.update(items)
+        except Exception as e:
+            logger.error(f"💥 Не удалось обновить кэш /latest: {e}")
+
+
+latest_cache = LatestNewsCache()
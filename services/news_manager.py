@@ -1,38 +1,198 @@
 # services/news_manager.py
-from database.db import AsyncSessionLocal
-from database.models import News, Feed
-from services.rss_reader import get_all_rss_news
-from sqlalchemy import select
+from database.db import AsyncSessionLocal, engine
+from database.models import News, Feed, NewsOutbox
+from services.rss_reader import fetch_feeds, flatten_items
+from services.latest_cache import latest_cache
+from services.dedup import near_duplicates, NearDuplicateIndex
+from services.metrics import Counter
+from services.retention import retention_border, filter_archived
+from sqlalchemy import select, event
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
+from logger.logger import logger
 
-async def collect_and_save_news():
+# Лимит строк в одном INSERT (у Postgres не больше 32767 параметров на запрос)
+INSERT_CHUNK_SIZE = 1000
+
+# === Метрики ===
+DB_QUERIES = Counter("db_queries_total", "Запросов к БД (все модули)")
+INGESTED = Counter("news_ingested_total", "Записи фидов по итогу сохранения", ["result"])
+
+
+# Счётчик запросов текущей задачи (например, тика приёма); задачи, запущенные из неё, его наследуют
+_query_scope = ContextVar("db_query_scope", default=None)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_db_query(conn, cursor, statement, parameters, context, executemany):
+    DB_QUERIES.inc()
+    scope = _query_scope.get()
+    if scope is not None:
+        scope[0] += 1
+
+
+@contextmanager
+def count_queries():
+    """Считает запросы к БД только этой задачи: with count_queries() as queries: ...; queries[0]."""
+    counter = [0]
+    token = _query_scope.set(counter)
+    try:
+        yield counter
+    finally:
+        _query_scope.reset(token)
+
+
+# Кэш соответствия URL фида -> feeds.id в пределах процесса
+_feed_ids = {}
+
+
+async def resolve_feed_ids(session, feed_urls):
+    """
+    Возвращает {url: id} для фидов, создавая недостающие одним запросом.
+    Новые id попадают в кэш процесса только через remember_feed_ids после коммита:
+    строки feeds из откатившейся транзакции не должны остаться в кэше.
+    """
+    feed_ids = dict(_feed_ids)
+    missing = sorted({url for url in feed_urls if url not in feed_ids})
+    if missing:
+        await session.execute(
+            pg_insert(Feed)
+            .values([{"name": url, "url": url, "type": "rss"} for url in missing])
+            .on_conflict_do_nothing(index_elements=["url"])
+        )
+        result = await session.execute(select(Feed.id, Feed.url).where(Feed.url.in_(missing)))
+        feed_ids.update({url: feed_id for feed_id, url in result})
+    return feed_ids
+
+
+def remember_feed_ids(feed_ids):
+    """Запоминает id фидов, когда транзакция с их созданием закоммичена."""
+    _feed_ids.update(feed_ids)
+
+
+class IngestSnapshot:
+    """Результат одного тика приёма: итоги по фидам, все записи и id только что вставленных новостей."""
+
+    def __init__(self, results, items, inserted_ids, skipped):
+        self.results = results
+        self.items = items
+        self.inserted_ids = inserted_ids
+        self.skipped = skipped
+        self.collected_at = datetime.utcnow()
+
+
+def parse_published(value):
+    """Преобразует нормализованную дату из RSS (ISO-строка) в datetime."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+async def save_news_batch(items):
+    """
+    Пакетно сохраняет новости: INSERT ... ON CONFLICT (url) DO NOTHING RETURNING id,
+    и ставит вставленные в очередь публикации (news_outbox). Почти-дубликаты уже известных
+    историй из других источников попадают в очередь со статусом duplicate и в LLM не идут.
+    Возвращает (список id вставленных новостей, количество пропущенных,
+    {url фида: сколько его записей действительно вставлено}).
+    """
+    # Убираем дубли внутри пачки, сохраняя порядок
+    unique = {}
+    for item in items:
+        unique.setdefault(item["link"], item)
+    if not unique:
+        return [], 0, {}
+
+    inserted = []
+    inserted_urls = []
     async with AsyncSessionLocal() as session:
-        rss_news = await get_all_rss_news()
-        created_count = 0
+        # Окно для поиска дубликатов загружается до вставки, чтобы не сравнивать новости сами с собой
+        await near_duplicates.ensure_loaded(session)
+        feed_ids = await resolve_feed_ids(session, [item["source"] for item in unique.values()])
+        now = datetime.utcnow()
+        rows = [
+            {
+                "title": item["title"],
+                "url": item["link"],
+                "source_id": feed_ids.get(item["source"]),
+                "published_at": parse_published(item.get("published")) or now,
+            }
+            for item in unique.values()
+        ]
+        # Записи старше срока хранения и уже архивированные URL (в том числе без даты) не вставляем заново
+        border = retention_border()
+        if border is not None:
+            archived = await filter_archived(session, [row["url"] for row in rows])
+            rows = [row for row in rows if row["published_at"] >= border and row["url"] not in archived]
+        # Старые публикации получают меньшие id и раньше попадают в очередь
+        rows.sort(key=lambda row: row["published_at"])
 
-        for item in rss_news:
-            stmt = select(News).where(News.url == item["link"])
+        for start in range(0, len(rows), INSERT_CHUNK_SIZE):
+            stmt = (
+                pg_insert(News)
+                .values(rows[start:start + INSERT_CHUNK_SIZE])
+                .on_conflict_do_nothing(index_elements=["url"])
+                .returning(News.id, News.title, News.url)
+            )
             result = await session.execute(stmt)
-            existing = result.scalar_one_or_none()
-
-            if not existing:
-                feed = await session.execute(select(Feed).where(Feed.url == item["source"]))
-                feed_obj = feed.scalar_one_or_none()
-
-                # Если источник ещё не в Feed — добавим
-                if not feed_obj:
-                    feed_obj = Feed(name=item["source"], url=item["source"], type="rss")
-                    session.add(feed_obj)
-                    await session.flush()
-
-                news_obj = News(
-                    title=item["title"],
-                    url=item["link"],
-                    source_id=feed_obj.id,
-                    published_at=datetime.utcnow()
-                )
-                session.add(news_obj)
-                created_count += 1
+            for news_id, title, url in result:
+                inserted.append((news_id, title))
+                inserted_urls.append(url)
+        inserted_ids = [news_id for news_id, _ in inserted]
+
+        # Ставим новые новости в очередь публикации в той же транзакции
+        if inserted:
+            outbox_rows = []
+            # Перепечатки внутри пачки ловит временный индекс; общий пополняется только после коммита
+            batch_index = NearDuplicateIndex()
+            for news_id, title in sorted(inserted):
+                in_batch = batch_index.check_and_add(news_id, title)
+                original_id = near_duplicates.find(title) or in_batch
+                if original_id is not None:
+                    logger.info(f"🧬 Дубликат новости #{original_id}: {title[:60]}")
+                status = "pending" if original_id is None else "duplicate"
+                outbox_rows.append({"news_id": news_id, "status": status})
+
+            await session.execute(
+                pg_insert(NewsOutbox)
+                .values(outbox_rows)
+                .on_conflict_do_nothing(index_elements=["news_id"])
+            )
 
         await session.commit()
-        print(f"✅ Добавлено {created_count} новых новостей.")
+
+    remember_feed_ids(feed_ids)
+    for news_id, title in sorted(inserted):
+        near_duplicates.add(news_id, title)
+
+    skipped = len(items) - len(inserted_ids)
+    INGESTED.inc(len(inserted_ids), result="inserted")
+    INGESTED.inc(skipped, result="skipped")
+    new_by_source = {}
+    for url in inserted_urls:
+        source = unique[url]["source"]
+        new_by_source[source] = new_by_source.get(source, 0) + 1
+    return inserted_ids, skipped, new_by_source
+
+
+async def collect_and_save_news(urls=None):
+    """Единый этап приёма: один раз за тик скачивает фиды (по умолчанию все) и сохраняет новые записи."""
+    results = await fetch_feeds(urls)
+    rss_news = flatten_items(results)
+    inserted_ids, skipped, new_by_source = await save_news_batch(rss_news)
+    # Новизну для адаптивного опроса считаем по реально вставленным строкам: кэш фидов
+    # обновляют и загрузки вне приёма (/latest, тест при старте), после них фид выглядел бы «без новых»
+    for result in results:
+        if result.status != "error":
+            result.new_count = new_by_source.get(result.url, 0)
+    logger.info(f"✅ Добавлено {len(inserted_ids)} новых новостей, пропущено {skipped}.")
+
+    # Обновляем снимок для /latest: новые записи сразу вытесняют устаревший кэш
+    if rss_news:
+        latest_cache.update(rss_news)
+    return IngestSnapshot(results, rss_news, inserted_ids, skipped)
@@ -0,0 +1,97 @@
+# services/parse_pool.py
+import asyncio
+import os
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import feedparser
+from logger.logger import logger, sampled
+from services.metrics import Histogram
+
+# === Конфигурация ===
+PARSE_EXECUTOR = os.getenv("RSS_PARSE_EXECUTOR", "thread").lower()  # thread / process
+PARSE_WORKERS = int(os.getenv("RSS_PARSE_WORKERS", 2))
+PARSE_QUEUE_SIZE = int(os.getenv("RSS_PARSE_QUEUE_SIZE", 8))  # задач в работе + в ожидании
+MAX_ENTRIES = 5  # Берем только первые 5 записей фида
+
+PARSE_SECONDS = Histogram("rss_parse_seconds", "Время разбора RSS-фида в пуле", ["feed"])
+PARSE_WAIT_SECONDS = Histogram("rss_parse_wait_seconds", "Ожидание свободного места в очереди пула", ["feed"])
+
+_executor = None
+_queue_slots = None
+
+# Последние замеры по каждому фиду: {url: {"parse_ms", "wait_ms", "entries"}}
+parse_timings = {}
+
+
+def entry_published(entry):
+    """Дата публикации записи в ISO-формате (UTC) или None."""
+    parsed_time = entry.get("published_parsed") or entry.get("updated_parsed")
+    if not parsed_time:
+        return None
+    try:
+        return datetime(*parsed_time[:6]).isoformat()
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_feed_entries(body, source, limit=MAX_ENTRIES):
+    """Разбирает тело фида в простые словари. Выполняется внутри пула."""
+    started = time.perf_counter()
+    parsed = feedparser.parse(body)
+
+    items = []
+    for entry in parsed.entries[:limit]:
+        if hasattr(entry, 'title') and hasattr(entry, 'link'):
+            items.append({
+                "title": entry.title,
+                "link": entry.link,
+                "source": source,
+                "published": entry_published(entry),
+            })
+
+    parse_ms = (time.perf_counter() - started) * 1000
+    return len(parsed.entries), items, parse_ms
+
+
+def _get_executor():
+    global _executor, _queue_slots
+    if _executor is None:
+        if PARSE_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=PARSE_WORKERS, thread_name_prefix="rss-parse")
+        _queue_slots = asyncio.Semaphore(max(PARSE_QUEUE_SIZE, PARSE_WORKERS))
+        logger.info(f"🧵 Пул парсинга RSS: {PARSE_EXECUTOR}, воркеров {PARSE_WORKERS}, очередь {PARSE_QUEUE_SIZE}")
+    return _executor
+
+
+async def parse_feed(body, source):
+    """Парсит фид в пуле, не блокируя event loop. Возвращает список новостей."""
+    executor = _get_executor()
+    loop = asyncio.get_running_loop()
+
+    queued_at = time.perf_counter()
+    async with _queue_slots:
+        wait_ms = (time.perf_counter() - queued_at) * 1000
+        total, items, parse_ms = await loop.run_in_executor(
+            executor, parse_feed_entries, body, source
+        )
+
+    parse_timings[source] = {"parse_ms": parse_ms, "wait_ms": wait_ms, "entries": total}
+    PARSE_SECONDS.observe(parse_ms / 1000, feed=source)
+    PARSE_WAIT_SECONDS.observe(wait_ms / 1000, feed=source)
+    logger.info(
+        f"📊 {source} - распаршено {total} записей за {parse_ms:.0f} мс (ожидание {wait_ms:.0f} мс)",
+        extra=sampled("rss_parse"),
+    )
+    return items
+
+
+def shutdown_parse_pool():
+    """Останавливает пул парсинга при выключении бота."""
+    global _executor, _queue_slots
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _queue_slots = None
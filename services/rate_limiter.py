@@ -0,0 +1,155 @@
+# services/rate_limiter.py
+import os
+import time
+import asyncio
+from aiogram.exceptions import TelegramRetryAfter
+from logger.logger import logger
+from services.metrics import Counter, Histogram
+
+# === Лимиты Telegram Bot API ===
+# ~30 сообщений в секунду на бота, 1 в секунду в личный чат, 20 в минуту в группу
+GLOBAL_RATE = float(os.getenv("TG_GLOBAL_RATE", 30))
+PRIVATE_CHAT_RATE = float(os.getenv("TG_PRIVATE_CHAT_RATE", 1))
+GROUP_CHAT_PER_MINUTE = float(os.getenv("TG_GROUP_CHAT_PER_MINUTE", 20))
+GROUP_CHAT_BURST = int(os.getenv("TG_GROUP_CHAT_BURST", 3))
+MAX_FLOOD_RETRIES = 5
+BUCKET_SWEEP_SECONDS = 60  # как часто выбрасывать бакеты простаивающих чатов
+
+# === Метрики ===
+SEND_SECONDS = Histogram("telegram_send_seconds", "Длительность вызова sendMessage", ["outcome"])
+SEND_WAIT_SECONDS = Histogram("telegram_send_wait_seconds", "Ожидание токена в лимитере перед отправкой")
+FLOOD_WAITS = Counter("telegram_flood_waits_total", "Ответы TelegramRetryAfter")
+FLOOD_WAIT_SECONDS = Counter("telegram_flood_wait_seconds_total", "Суммарное время flood wait, сек")
+
+
+class TokenBucket:
+    """Классический token bucket: rate токенов в секунду, не больше capacity в запасе."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def is_idle(self, now):
+        """Бакет полон, не на паузе и никем не занят — его можно выбросить и создать заново."""
+        if self._lock.locked() or now < self.blocked_until:
+            return False
+        return self.tokens + (now - self.updated_at) * self.rate >= self.capacity
+
+    def pause(self, seconds):
+        """Блокирует бакет на время, которое потребовал Telegram (flood wait)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        # После паузы разрешаем ровно одну отправку, дальше — обычный темп
+        self.tokens = 1
+        self.updated_at = self.blocked_until
+
+
+class TelegramSendScheduler:
+    """
+    Планировщик отправки: общий бакет на бота и отдельный бакет на каждый чат.
+    Массовые отправки (bulk, рассылка подписчикам) берут общий токен по одной и только
+    когда его не ждёт публикация, поэтому рассылка не отнимает темп у следующей новости.
+    """
+
+    def __init__(self):
+        self._global = TokenBucket(GLOBAL_RATE, GLOBAL_RATE)
+        self._chats = {}
+        self._swept_at = time.monotonic()
+        self.flood_waits = 0
+        self._urgent_waiting = 0
+        self._urgent_idle = asyncio.Event()
+        self._urgent_idle.set()
+        self._bulk_gate = asyncio.Lock()
+
+    async def _acquire_global(self, bulk):
+        if bulk:
+            async with self._bulk_gate:
+                await self._urgent_idle.wait()
+                await self._global.acquire()
+            return
+
+        self._urgent_waiting += 1
+        self._urgent_idle.clear()
+        try:
+            await self._global.acquire()
+        finally:
+            self._urgent_waiting -= 1
+            if not self._urgent_waiting:
+                self._urgent_idle.set()
+
+    def _sweep(self, now):
+        # При рассылке тысячам подписчиков бакеты копились бы бесконечно; полный бакет равен новому
+        self._swept_at = now
+        for chat_id in [chat_id for chat_id, bucket in self._chats.items() if bucket.is_idle(now)]:
+            del self._chats[chat_id]
+
+    def _chat_bucket(self, chat_id):
+        now = time.monotonic()
+        if now - self._swept_at >= BUCKET_SWEEP_SECONDS:
+            self._sweep(now)
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Отрицательные id — группы и каналы, положительные — личные чаты
+            if int(chat_id) < 0:
+                bucket = TokenBucket(GROUP_CHAT_PER_MINUTE / 60, GROUP_CHAT_BURST)
+            else:
+                bucket = TokenBucket(PRIVATE_CHAT_RATE, 1)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def send_message(self, bot, bulk=False, **kwargs):
+        """
+        bot.send_message с учётом лимитов; на TelegramRetryAfter ждёт ровно указанное время.
+        bulk=True — низкий приоритет в общем бакете (рассылки).
+        """
+        chat_bucket = self._chat_bucket(kwargs["chat_id"])
+
+        for attempt in range(1, MAX_FLOOD_RETRIES + 1):
+            wait_started = time.perf_counter()
+            await chat_bucket.acquire()
+            await self._acquire_global(bulk)
+            SEND_WAIT_SECONDS.observe(time.perf_counter() - wait_started)
+
+            started = time.perf_counter()
+            try:
+                result = await bot.send_message(**kwargs)
+                SEND_SECONDS.observe(time.perf_counter() - started, outcome="ok")
+                return result
+            except TelegramRetryAfter as e:
+                SEND_SECONDS.observe(time.perf_counter() - started, outcome="flood_wait")
+                FLOOD_WAITS.inc()
+                FLOOD_WAIT_SECONDS.inc(e.retry_after)
+                self.flood_waits += 1
+                logger.warning(
+                    f"🚦 Flood wait для чата {kwargs['chat_id']}: ждём {e.retry_after} сек "
+                    f"({attempt}/{MAX_FLOOD_RETRIES})"
+                )
+                chat_bucket.pause(e.retry_after)
+                if attempt == MAX_FLOOD_RETRIES:
+                    raise
+            except Exception:
+                SEND_SECONDS.observe(time.perf_counter() - started, outcome="error")
+                raise
+
+
+send_scheduler = TelegramSendScheduler()
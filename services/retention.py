@@ -0,0 +1,216 @@
+# services/retention.py
+"""
+Хранение истории: новости старше NEWS_RETENTION_DAYS (по published_at) вместе с их
+sent_news и news_outbox выгружаются в backup/ и удаляются из рабочих таблиц.
+
+Каждая пачка обрабатывается в своей транзакции: строки отбираются с FOR UPDATE SKIP LOCKED,
+выгружаются через COPY ... TO STDOUT в CSV, сжатый gzip (backup/archive/<дата>/<таблица>-<id>-<id>.csv.gz),
+файлы дописываются на диск, и только после этого строки удаляются. Если транзакция откатится,
+повторный запуск перезапишет файлы той же пачки. Новости, ещё стоящие в очереди публикации
+или рассылки подписчикам, не архивируются. URL архивированных новостей остаются в archived_urls, чтобы приём не вставил
+и не опубликовал заново запись, которая всё ещё висит в фиде (в том числе без даты).
+
+Архивация идёт отдельной задачей планировщика, ограниченными пачками с паузами,
+поэтому тик приёма новостей не ждёт её и не упирается в долгие блокировки.
+"""
+import os
+import gzip
+import time
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import select, text
+from database.db import engine
+from database.models import ArchivedUrl
+from services.metrics import Counter, Histogram
+from logger.logger import logger
+
+# === Конфигурация ===
+NEWS_RETENTION_DAYS = int(os.getenv("NEWS_RETENTION_DAYS", 90))       # 0 — хранить всё
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join("backup", "archive"))
+ARCHIVE_CHUNK_ROWS = int(os.getenv("ARCHIVE_CHUNK_ROWS", 2000))       # новостей в одной транзакции
+ARCHIVE_MAX_CHUNKS = int(os.getenv("ARCHIVE_MAX_CHUNKS", 50))         # пачек за один запуск
+ARCHIVE_FLUSH_BYTES = 256 * 1024   # CSV копится до этого размера и сжимается в потоке
+ARCHIVE_CHUNK_PAUSE = float(os.getenv("ARCHIVE_CHUNK_PAUSE", 0.5))    # пауза между пачками (сек)
+ARCHIVE_INTERVAL_MINUTES = int(os.getenv("ARCHIVE_INTERVAL_MINUTES", 60))
+ARCHIVED_URL_TTL_DAYS = int(os.getenv("ARCHIVED_URL_TTL_DAYS", 365))  # сколько помнить URL из архива
+
+# Ключ advisory-блокировки: архивирует только один экземпляр бота
+ARCHIVE_LOCK_ID = 746_202
+
+# === Метрики ===
+ARCHIVED_ROWS = Counter("archived_rows_total", "Строк выгружено в архив и удалено", ["table"])
+ARCHIVE_CHUNK_SECONDS = Histogram("archive_chunk_seconds", "Выгрузка и удаление одной пачки архива")
+
+# Пачка кандидатов: старые новости, которые уже не ждут ни публикации, ни рассылки
+SELECT_CHUNK = """
+    SELECT n.id FROM news n
+    WHERE n.published_at < :border
+      AND NOT EXISTS (
+          SELECT 1 FROM news_outbox o
+          WHERE o.news_id = n.id AND (o.status IN ('pending', 'processing') OR o.fanout_pending)
+      )
+    ORDER BY n.id
+    LIMIT :limit
+    FOR UPDATE OF n SKIP LOCKED
+"""
+
+REMEMBER_URLS = """
+    INSERT INTO archived_urls (url, archived_at)
+    SELECT url, now() AT TIME ZONE 'UTC' FROM news WHERE id = ANY(:ids)
+    ON CONFLICT (url) DO NOTHING
+"""
+
+FORGET_URLS = "DELETE FROM archived_urls WHERE archived_at < :border"
+
+# Порядок выгрузки совпадает с порядком удаления: сначала зависимые таблицы
+ARCHIVE_TABLES = [
+    ("sent_news", "SELECT * FROM sent_news WHERE news_id = ANY($1::int[]) ORDER BY id",
+     "DELETE FROM sent_news WHERE news_id = ANY(:ids)"),
+    ("news_outbox", "SELECT * FROM news_outbox WHERE news_id = ANY($1::int[]) ORDER BY id",
+     "DELETE FROM news_outbox WHERE news_id = ANY(:ids)"),
+    ("news", "SELECT * FROM news WHERE id = ANY($1::int[]) ORDER BY id",
+     "DELETE FROM news WHERE id = ANY(:ids)"),
+]
+
+
+async def filter_archived(session, urls):
+    """Возвращает множество URL из urls, которые уже были перенесены в архив."""
+    if not urls:
+        return set()
+    result = await session.execute(select(ArchivedUrl.url).where(ArchivedUrl.url.in_(list(urls))))
+    return {url for url, in result}
+
+
+def retention_border():
+    """Граница хранения (naive UTC, как published_at) или None, если архивация выключена."""
+    if NEWS_RETENTION_DAYS <= 0:
+        return None
+    return datetime.utcnow() - timedelta(days=NEWS_RETENTION_DAYS)
+
+
+class GzipSink:
+    """
+    Приёмник для COPY: копит CSV в буфере и сжимает его в .gz во временный файл в отдельном
+    потоке, чтобы gzip и диск не занимали event loop. На место файл встаёт после close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = path + ".part"
+        self._buffer = bytearray()
+        self._file = gzip.open(self.tmp_path, "wb")
+
+    async def __call__(self, data):
+        # asyncpg дожидается каждого вызова, поэтому записи в файл не пересекаются
+        self._buffer += data
+        if len(self._buffer) >= ARCHIVE_FLUSH_BYTES:
+            await self._flush()
+
+    async def _flush(self):
+        data, self._buffer = bytes(self._buffer), bytearray()
+        await asyncio.to_thread(self._file.write, data)
+
+    def _finish(self):
+        self._file.close()
+        with open(self.tmp_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(self.tmp_path, self.path)
+        # fsync каталога — чтобы переименование пережило сбой до удаления строк из БД
+        dir_fd = os.open(os.path.dirname(self.path) or ".", os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    async def close(self):
+        await self._flush()
+        await asyncio.to_thread(self._finish)
+
+    def discard(self):
+        self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+async def _export(driver_conn, query, ids, path):
+    """Потоково выгружает результат запроса в gzip-файл."""
+    sink = GzipSink(path)
+    try:
+        await driver_conn.copy_from_query(query, ids, output=sink, format="csv", header=True)
+        await sink.close()
+    except BaseException:
+        sink.discard()
+        raise
+
+
+async def archive_chunk(border):
+    """
+    Архивирует одну пачку старых новостей в отдельной транзакции.
+    Возвращает количество заархивированных новостей (0 — архивировать больше нечего).
+    """
+    started = time.perf_counter()
+    async with engine.begin() as conn:
+        result = await conn.execute(text(SELECT_CHUNK), {"border": border, "limit": ARCHIVE_CHUNK_ROWS})
+        ids = [row[0] for row in result]
+        if not ids:
+            return 0
+
+        day_dir = os.path.join(ARCHIVE_DIR, datetime.utcnow().strftime("%Y-%m-%d"))
+        os.makedirs(day_dir, exist_ok=True)
+
+        # COPY идёт через asyncpg-соединение той же транзакции
+        raw = await conn.get_raw_connection()
+        for table, query, _ in ARCHIVE_TABLES:
+            path = os.path.join(day_dir, f"{table}-{ids[0]}-{ids[-1]}.csv.gz")
+            await _export(raw.driver_connection, query, ids, path)
+
+        # Файлы уже на диске — теперь строки можно удалять, запомнив их URL
+        await conn.execute(text(REMEMBER_URLS), {"ids": ids})
+        counts = {}
+        for table, _, statement in ARCHIVE_TABLES:
+            result = await conn.execute(text(statement), {"ids": ids})
+            counts[table] = result.rowcount
+
+    ARCHIVE_CHUNK_SECONDS.observe(time.perf_counter() - started)
+    for table, count in counts.items():
+        ARCHIVED_ROWS.inc(count, table=table)
+    logger.info(
+        f"🗄 Архив: новости #{ids[0]}…#{ids[-1]} — "
+        + ", ".join(f"{table} {count}" for table, count in counts.items())
+    )
+    return len(ids)
+
+
+async def archive_old_news():
+    """Задача планировщика: выгружает и удаляет историю старше NEWS_RETENTION_DAYS пачками."""
+    border = retention_border()
+    if border is None:
+        return 0
+
+    total = 0
+    # Отдельное соединение держит блокировку на весь запуск; второй экземпляр просто пропустит ход
+    async with engine.connect() as lock_conn:
+        locked = await lock_conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": ARCHIVE_LOCK_ID})
+        await lock_conn.commit()
+        if not locked:
+            logger.info("🗄 Архивация уже идёт в другом экземпляре, пропускаем")
+            return 0
+        try:
+            async with engine.begin() as conn:
+                forget_border = datetime.utcnow() - timedelta(days=ARCHIVED_URL_TTL_DAYS)
+                await conn.execute(text(FORGET_URLS), {"border": forget_border})
+            for _ in range(ARCHIVE_MAX_CHUNKS):
+                archived = await archive_chunk(border)
+                total += archived
+                if archived < ARCHIVE_CHUNK_ROWS:
+                    break
+                await asyncio.sleep(ARCHIVE_CHUNK_PAUSE)
+        except Exception as e:
+            logger.exception(f"💥 Ошибка архивации старых новостей: {e}")
+        finally:
+            await lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": ARCHIVE_LOCK_ID})
+            await lock_conn.commit()
+
+    if total:
+        logger.info(f"🗄 Архивация завершена: {total} новостей старше {NEWS_RETENTION_DAYS} дн. перенесено в {ARCHIVE_DIR}")
+    return total
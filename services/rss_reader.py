@@ -1,10 +1,15 @@
 # bot/services/rss_reader.py
-import aiohttp
-import feedparser
+import os
 import asyncio
-from datetime import datetime
-from logger.logger import logger
+from urllib.parse import urlsplit
+from logger.logger import logger, sampled
+from services.feed_cache import feed_cache, content_hash
+from services.parse_pool import parse_feed
+from services.feed_registry import feed_registry
+from services.http_client import get_http_session, http_stats
+from services.metrics import Counter, Gauge, Histogram
 
+# Фиды по умолчанию: ими заполняется пустая таблица feeds, дальше список берётся из БД
 RSS_FEEDS = [
     "https://www.goha.ru/rss/news",
     "https://www.playground.ru/rss/news.xml",
@@ -22,51 +27,135 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 }
 
-async def fetch_feed_simple(session, url):
-    """Упрощенная загрузка одного RSS-фида."""
-    logger.info(f"🔄 Пытаемся загрузить: {url}")
+# Ограничения одновременных загрузок: всего и на один хост
+FETCH_CONCURRENCY = int(os.getenv("RSS_FETCH_CONCURRENCY", 20))
+FETCH_PER_HOST = int(os.getenv("RSS_FETCH_PER_HOST", 2))
+
+# === Метрики ===
+FETCH_SECONDS = Histogram("rss_fetch_seconds", "Время загрузки RSS-фида", ["feed"])
+FETCH_BYTES = Counter("rss_fetch_bytes_total", "Скачано байт тела RSS-фидов", ["feed"])
+FETCH_RESULTS = Counter("rss_fetch_total", "Загрузки RSS-фидов по итогу", ["feed", "status"])
+HTTP_CONNECTIONS = Gauge(
+    "http_client_events", "Счётчики общего HTTP-клиента (запросы, соединения, DNS)", ["event"],
+    callback=lambda: {(name,): value for name, value in http_stats().items()},
+)
+
+_fetch_slots = None
+_host_slots = {}
+
+
+def _slots_for(url):
+    """Общий семафор и семафор хоста для загрузки url."""
+    global _fetch_slots
+    if _fetch_slots is None:
+        _fetch_slots = asyncio.Semaphore(FETCH_CONCURRENCY)
+    host = urlsplit(url).hostname or ""
+    if host not in _host_slots:
+        _host_slots[host] = asyncio.Semaphore(FETCH_PER_HOST)
+    return _fetch_slots, _host_slots[host]
+
+
+async def fetch_feed_limited(session, url):
+    """fetch_feed под общим и похостовым лимитом."""
+    global_slots, host_slots = _slots_for(url)
+    async with host_slots:
+        async with global_slots:
+            with FETCH_SECONDS.time(feed=url):
+                result = await fetch_feed(session, url)
+    FETCH_RESULTS.inc(feed=url, status=result.status)
+    return result
+
+class FeedFetchResult:
+    """Итог загрузки одного фида: статус (changed / unchanged / error), записи и сколько из них новых."""
+
+    def __init__(self, url, status, items=None, new_count=0):
+        self.url = url
+        self.status = status
+        self.items = items or []
+        self.new_count = new_count
+
+
+async def fetch_feed(session, url):
+    """Загрузка одного RSS-фида с условным GET (ETag / Last-Modified)."""
+    logger.info(f"🔄 Пытаемся загрузить: {url}", extra=sampled("rss_fetch"))
     try:
-        async with session.get(url, headers=HEADERS, timeout=10) as response:
+        headers = {**HEADERS, **feed_cache.conditional_headers(url)}
+        async with session.get(url, headers=headers, timeout=10) as response:
+            if response.status == 304:
+                logger.info(f"♻️ {url} - не изменился (304), берём из кэша", extra=sampled("rss_fetch"))
+                return FeedFetchResult(url, "unchanged", feed_cache.cached_items(url))
+
             if response.status != 200:
                 logger.warning(f"❌ {url} - статус {response.status}")
-                return []
+                return FeedFetchResult(url, "error")
 
-            content = await response.text()
-            logger.info(f"✅ {url} - загружено {len(content)} символов")
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            body = await response.read()
+            FETCH_BYTES.inc(len(body), feed=url)
+            logger.info(f"✅ {url} - загружено {len(body)} байт", extra=sampled("rss_fetch"))
 
-            # Парсим синхронно для простоты
-            parsed = feedparser.parse(content)
-            logger.info(f"📊 {url} - распаршено {len(parsed.entries)} записей")
+            body_hash = content_hash(body)
+            if feed_cache.is_unchanged(url, body_hash):
+                # Сервер не поддерживает валидаторы, но тело то же — парсить незачем
+                feed_cache.update(url, etag, last_modified)
+                logger.info(f"♻️ {url} - содержимое не изменилось, берём из кэша", extra=sampled("rss_fetch"))
+                return FeedFetchResult(url, "unchanged", feed_cache.cached_items(url))
 
-            items = []
-            for entry in parsed.entries[:5]:  # Берем только первые 5
-                if hasattr(entry, 'title') and hasattr(entry, 'link'):
-                    items.append({
-                        "title": entry.title,
-                        "link": entry.link,
-                        "source": url
-                    })
-                    logger.info(f"📰 Добавлена: {entry.title[:30]}...")
+            # Парсим в пуле, чтобы большой фид не замораживал event loop
+            items = await parse_feed(body, url)
+            for item in items:
+                logger.debug(f"📰 Добавлена: {item['title'][:30]}...", extra=sampled("rss_item"))
 
-            return items
+            # Новые — те, которых не было в прошлой версии фида
+            known_links = {item["link"] for item in feed_cache.cached_items(url)}
+            new_count = sum(1 for item in items if item["link"] not in known_links)
+
+            feed_cache.update(url, etag, last_modified, body_hash, items)
+            return FeedFetchResult(url, "changed", items, new_count)
 
     except Exception as e:
         logger.error(f"💥 Ошибка с {url}: {e}")
-        return []
+        return FeedFetchResult(url, "error")
+
+
+async def fetch_feed_simple(session, url):
+    """Упрощенная загрузка одного RSS-фида: только список записей."""
+    result = await fetch_feed(session, url)
+    return result.items
+
+
+async def fetch_feeds(urls=None):
+    """
+    Загружает указанные фиды (по умолчанию все включённые из реестра) и возвращает список FeedFetchResult.
+    Задачи стартуют в порядке приоритета, поэтому при упоре в лимиты важные фиды идут первыми.
+    """
+    urls = await feed_registry.get_urls() if urls is None else urls
+    # Общая сессия приложения: соединения, TLS и DNS переиспользуются между тиками
+    session = get_http_session()
+    tasks = [fetch_feed_limited(session, url) for url in urls]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    feed_cache.save()
+    return [
+        result if isinstance(result, FeedFetchResult) else FeedFetchResult(url, "error")
+        for url, result in zip(urls, results)
+    ]
+
+
+def flatten_items(results):
+    all_items = []
+    for result in results:
+        all_items.extend(result.items)
+    return all_items
+
 
-async def get_all_rss_news():
+async def get_all_rss_news(urls=None):
     """Упрощенная версия сбора новостей."""
     logger.info("🎯 ЗАПУСК get_all_rss_news()")
 
     try:
-        async with aiohttp.ClientSession() as session:
-            tasks = [fetch_feed_simple(session, url) for url in RSS_FEEDS]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        all_items = []
-        for result in results:
-            if isinstance(result, list):
-                all_items.extend(result)
+        all_items = flatten_items(await fetch_feeds(urls))
 
         logger.info(f"🎉 ФИНАЛЬНЫЙ РЕЗУЛЬТАТ: {len(all_items)} новостей")
 
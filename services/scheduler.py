@@ -1,16 +1,104 @@
 # services/scheduler.py
+import os
+from datetime import datetime, timezone
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from services.news_manager import collect_and_save_news
-from services.sender import send_new_news
+from services.news_manager import collect_and_save_news, count_queries
+from services.metrics import Histogram
+from services.sender import send_new_news, resume_fanouts
+from services.feed_registry import feed_registry
+from services.feed_poller import feed_poller
+from services.latest_cache import latest_cache
+from services.retention import archive_old_news, ARCHIVE_INTERVAL_MINUTES, NEWS_RETENTION_DAYS
+from logger.logger import logger
+
+# Как часто проверять, каким фидам пора в опрос (у каждого фида свой интервал)
+POLL_TICK_SECONDS = int(os.getenv("POLL_TICK_SECONDS", 30))
+# Публикация запускается сразу при новых записях и не реже этого интервала (для повторов)
+PUBLISH_INTERVAL_SECONDS = int(os.getenv("PUBLISH_INTERVAL_SECONDS", 11 * 60))
+
+TICK_SECONDS = Histogram("scheduler_tick_seconds", "Длительность тика планировщика", ["stage"])
+TICK_DB_QUERIES = Histogram(
+    "scheduler_tick_db_queries", "Запросов к БД за один тик",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000),
+)
+
+_scheduler = None
+_last_snapshot = None
+_publishing = False
+_publish_requested = False
+
 
 async def scheduled_job():
-    await collect_and_save_news()
-    await send_new_news()
+    """Тик приёма: только скачивание фидов и запись новых новостей, публикация идёт отдельной задачей."""
+    global _last_snapshot
+
+    # Только запросы самого тика: публикация, рассылки и архивация идут параллельно и не считаются
+    with count_queries() as queries:
+        due = feed_poller.due_feeds(await feed_registry.get_urls())
+        if due:
+            # Фиды скачиваются один раз за тик, публикация работает с тем же снимком
+            with TICK_SECONDS.time(stage="ingest"):
+                snapshot = await collect_and_save_news(due)
+            feed_poller.record(snapshot.results)
+            _last_snapshot = snapshot
+            if snapshot.inserted_ids:
+                request_publish()
+    TICK_DB_QUERIES.observe(queries[0])
+    # Опрос идёт по расписанию фидов — снимок /latest свеж, пока тики проходят
+    latest_cache.touch()
+
+
+def request_publish():
+    """Будит публикацию сразу, не дожидаясь интервала; если она уже идёт — повторит проход после."""
+    global _publish_requested
+    if _publishing or _scheduler is None:
+        _publish_requested = True
+        return
+    _scheduler.modify_job("news_publisher", next_run_time=datetime.now(timezone.utc))
+
+
+async def publish_job():
+    """Публикация очереди (LLM и отправка) — не дольше одного экземпляра, приём её не ждёт."""
+    global _publishing, _publish_requested
+    _publishing = True
+    try:
+        # Рассылки подписчикам, прерванные рестартом или сбоями, — в фоне, публикацию не задерживают
+        try:
+            await resume_fanouts()
+        except Exception as e:
+            logger.error(f"💥 Не удалось продолжить рассылки подписчикам: {e}")
+        while True:
+            _publish_requested = False
+            with TICK_SECONDS.time(stage="publish"):
+                await send_new_news(_last_snapshot)
+            # Пока шла публикация, приём мог добавить новости
+            if not _publish_requested:
+                break
+    finally:
+        _publishing = False
+
 
 def setup_scheduler():
+    global _scheduler
     scheduler = AsyncIOScheduler(timezone="UTC")
-    # 🔹 Запускать задачу каждые 15 минут
-    scheduler.add_job(scheduled_job, "interval", minutes=11, id="news_collector")
+    # 🔹 Короткий тик: сам опрос каждого фида идёт по его собственному адаптивному интервалу
+    scheduler.add_job(
+        scheduled_job, "interval", seconds=POLL_TICK_SECONDS,
+        id="news_collector", max_instances=1, coalesce=True,
+    )
+    # 🔹 Публикация — своей задачей: долгие вызовы LLM не останавливают опрос фидов
+    scheduler.add_job(
+        publish_job, "interval", seconds=PUBLISH_INTERVAL_SECONDS,
+        id="news_publisher", max_instances=1, coalesce=True,
+        next_run_time=datetime.now(timezone.utc),  # очередь, оставшаяся с прошлого запуска, — сразу
+    )
+    # 🔹 Архивация истории — отдельной задачей, тик приёма её не ждёт
+    if NEWS_RETENTION_DAYS > 0:
+        scheduler.add_job(
+            archive_old_news, "interval", minutes=ARCHIVE_INTERVAL_MINUTES,
+            id="news_archiver", max_instances=1, coalesce=True,
+        )
     scheduler.start()
-    print("🔁 Планировщик запущен: сбор и рассылка новостей каждые 11 минут.")
+    _scheduler = scheduler
+    logger.info(f"🔁 Планировщик запущен: проверка фидов каждые {POLL_TICK_SECONDS} сек, интервалы адаптивные.")
     return scheduler
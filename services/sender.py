@@ -1,39 +1,89 @@
 import os
 import asyncio
 import re
-from datetime import datetime
-import dateutil.parser
+from collections import deque
 from aiogram import Bot
-from sqlalchemy import select
-from database.db import AsyncSessionLocal
-from database.models import News, SentNews
-from services.rss_reader import get_all_rss_news
-from services.gigachat import generate_gigachat_summary
-from logger.logger import logger
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from itertools import islice
+from services.gigachat import generate_gigachat_summary, generate_gigachat_batch, batch_size_for, is_stub_reply
+from services.job_queue import (
+    claim_batch, renew_lease, complete_job, fail_job, release_expired_leases, pending_count,
+    claim_fanouts, renew_fanout_lease, finish_fanout,
+)
+from services.metrics import Counter, Gauge
+from services.rate_limiter import send_scheduler
+from services.article_fetcher import prefetch_articles
+from services.summary_cache import get_cached_summaries, store_summary, drop_summary, evict_summaries
+from services.subscriptions import pending_recipients, record_deliveries, unsubscribe
+from logger.logger import logger, sampled
 
 # === Конфигурация ===
 BOT_TOKEN = os.getenv("TOKEN")
-CHAT_ID = int(os.getenv("CHAT_ID"))
-TOPIC_ID = os.getenv("TOPIC_ID")
-TOPIC_ID = int(TOPIC_ID) if TOPIC_ID else None
 
-bot = Bot(token=BOT_TOKEN)
+
+def parse_targets(value):
+    """Разбирает PUBLISH_TARGETS вида "-100123:45,-100678" в список (chat_id, topic_id)."""
+    targets = []
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        chat_id, _, topic_id = part.partition(":")
+        targets.append((int(chat_id), int(topic_id) if topic_id else None))
+    return targets
+
+
+def default_targets():
+    """Один чат CHAT_ID (и топик TOPIC_ID) — читается, только если PUBLISH_TARGETS не задан."""
+    chat_id = os.getenv("CHAT_ID")
+    if not chat_id:
+        raise EnvironmentError("❌ Не задан ни PUBLISH_TARGETS, ни CHAT_ID")
+    topic_id = os.getenv("TOPIC_ID")
+    return [(int(chat_id), int(topic_id) if topic_id else None)]
+
+
+# Куда публиковать: список PUBLISH_TARGETS или, по умолчанию, CHAT_ID/TOPIC_ID
+PUBLISH_TARGETS = parse_targets(os.getenv("PUBLISH_TARGETS")) or default_targets()
+
+_bot = None
+
+
+def get_bot():
+    """Бот для публикации: тот, что передан через set_bot, или свой, созданный при первой отправке."""
+    global _bot
+    if _bot is None:
+        _bot = Bot(token=BOT_TOKEN)
+    return _bot
+
+
+def set_bot(bot):
+    """Публиковать через уже созданный бот (из main), а не держать второй экземпляр с отдельной сессией."""
+    global _bot
+    _bot = bot
+
 
 MAX_RETRIES = 3          # попытки при сбое
 RETRY_DELAY = 30         # пауза между попытками (сек)
-DELAY_BETWEEN_NEWS = 10  # пауза между публикациями (сек)
+SUMMARY_WORKERS = int(os.getenv("SUMMARY_WORKERS", 3))  # параллельных запросов к LLM
+SUMMARY_PREFETCH_FACTOR = 2  # на сколько «воркеров» вперёд готовить тексты до публикации
 
+# Рассылка подписчикам: тот же текст, что ушёл в PUBLISH_TARGETS
+SUBSCRIBER_FANOUT = os.getenv("SUBSCRIBER_FANOUT", "true").lower() == "true"
+FANOUT_BATCH_SIZE = int(os.getenv("FANOUT_BATCH_SIZE", 500))    # получателей на выборку и на INSERT доставок
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", 20))   # одновременных отправок (темп задаёт лимитер)
+FANOUT_SEND_RETRIES = int(os.getenv("FANOUT_SEND_RETRIES", 3))  # попыток на подписчика при временных сбоях
+FANOUT_RETRY_DELAY = float(os.getenv("FANOUT_RETRY_DELAY", 2))  # первая пауза между попытками (сек), дальше ×2
 
-# === Утилиты ===
-def to_datetime_safe(value):
-    try:
-        if not value:
-            return datetime.utcnow()
-        return dateutil.parser.parse(value)
-    except Exception:
-        return datetime.utcnow()
+# === Метрики ===
+PUBLISHED = Counter("news_published_total", "Итоги публикации новостей", ["result"])
+OUTBOX_BACKLOG = Gauge("news_outbox_pending", "Новостей в очереди на публикацию (на начало цикла)")
+FANOUT_DELIVERIES = Counter("subscriber_deliveries_total", "Доставки подписчикам по итогу", ["result"])
 
+# Рассылки идут в фоне, чтобы не задерживать публикацию следующих новостей
+_fanout_tasks = set()
 
+
+# === Утилиты ===
 def sanitize_llm_reply(text: str) -> str:
     """Удаляет служебные метки и адаптирует формат под Telegram."""
     cleaned = text.strip()
@@ -44,113 +94,423 @@ def sanitize_llm_reply(text: str) -> str:
     return cleaned.strip()
 
 
-async def sync_rss_to_db():
-    """Сохраняет новые записи из RSS."""
-    news_list = await get_all_rss_news()
-    new_count = 0
-
-    async with AsyncSessionLocal() as session:
-        for item in news_list:
-            stmt = select(News).where(News.url == item["link"])
-            result = await session.execute(stmt)
-            exists = result.scalar_one_or_none()
-            if exists:
-                continue
+# === Этапы конвейера ===
+def validate_summary(generated_text):
+    """Проверяет ответ LLM (свежий или из кэша) и возвращает очищенный текст; иначе ValueError."""
+    if not generated_text:
+        raise ValueError("LLM вернул пустой ответ")
+    if is_stub_reply(generated_text):
+        raise ValueError("LLM вернул заглушку")
 
-            published_at = to_datetime_safe(item.get("published") or item.get("updated"))
-            news = News(
-                title=item["title"],
-                url=item["link"],
-                published_at=published_at,
-            )
-            session.add(news)
-            new_count += 1
+    clean_text = sanitize_llm_reply(generated_text)
+    logger.debug(f"Текст после очистки ({len(clean_text)} симв.): {clean_text[:100]!r}")
 
-        await session.commit()
+    if len(clean_text) < 50:
+        raise ValueError("Ответ от LLM слишком короткий")
+    return clean_text
 
-    logger.info(f"📰 Добавлено {new_count} новых новостей.")
-    return new_count
 
+async def accept_summary(news, generated_text):
+    """Проверяет ответ LLM, кладёт его в кэш и возвращает текст для Telegram."""
+    clean_text = validate_summary(generated_text)
 
-# === Основная логика ===
-async def send_new_news():
-    """Обрабатывает и публикует новые новости."""
-    await sync_rss_to_db()
-
-    async with AsyncSessionLocal() as session:
-        stmt = (
-            select(News)
-            .outerjoin(SentNews, SentNews.news_id == News.id)
-            .where(SentNews.id.is_(None))
-        )
-        result = await session.execute(stmt)
-        unsent_news = result.scalars().all()
-
-    if not unsent_news:
-        logger.info("😴 Нет новых новостей для публикации.")
-        return
+    try:
+        await store_summary(news.url, generated_text)
+    except Exception as e:
+        logger.warning(f"⚠️ Не удалось сохранить текст в кэш для {news.url}: {e}")
 
-    logger.info(f"🌐 Найдено {len(unsent_news)} новостей. Начинаем обработку...")
+    return clean_text
 
-    for news in unsent_news:
-        success = False
 
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
+async def use_cached_summary(news, cached_text):
+    """
+    Проверяет текст из кэша теми же правилами, что и свежий ответ LLM.
+    Отклонённый текст (например, заглушка, сохранённая до появления проверки) удаляется из кэша;
+    тогда возвращается None, и новость готовится заново.
+    """
+    try:
+        clean_text = validate_summary(cached_text)
+    except ValueError as e:
+        logger.warning(f"🗑 Текст из кэша отклонён для {news.url}: {e}")
+        try:
+            await drop_summary(news.url)
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось удалить текст из кэша для {news.url}: {e}")
+        return None
+    logger.info(f"💾 Текст из кэша: {news.url}")
+    return clean_text
+
+
+async def summarize_news(news, slots, article_text=None):
+    """
+    Готовит текст поста через LLM с повторами.
+    article_text — предзагруженный текст статьи, уходит в промт вместе со ссылкой.
+    Слот воркера занят только на время вызова LLM: пауза перед повтором его освобождает,
+    поэтому ретраи одной новости не задерживают остальные.
+    """
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            async with slots:
                 logger.info(f"🧠 [{attempt}/{MAX_RETRIES}] Анализ: {news.url}")
-                generated_text = generate_gigachat_summary(news.url)
-
-                if not generated_text:
-                    raise ValueError("LLM вернул пустой ответ")
-
-                clean_text = sanitize_llm_reply(generated_text)
-                logger.debug(f"Текст после очистки ({len(clean_text)} симв.): {clean_text[:100]!r}")
-
-                if len(clean_text) < 50:
-                    raise ValueError("Ответ от LLM слишком короткий")
+                generated_text = await generate_gigachat_summary(news.url, article_text)
+
+            return await accept_summary(news, generated_text)
+
+        except Exception as e:
+            logger.error(f"❌ Попытка {attempt} не удалась для {news.url}: {e}")
+            if attempt < MAX_RETRIES:
+                logger.info(f"⏳ Повтор через {RETRY_DELAY} сек...")
+                await asyncio.sleep(RETRY_DELAY)
+            else:
+                logger.error(f"💀 Все попытки исчерпаны для {news.url}")
+
+    return None
+
+
+async def summarize_group(group, slots, cached):
+    """
+    Готовит тексты для группы новостей: из кэша, одним пакетным запросом к LLM
+    или, для частей пакета, не прошедших проверку, — по одной с повторами.
+    Статьи предзагружаются до того, как группа займёт слот LLM.
+    Возвращает {url: текст или None}.
+    """
+    texts = {}
+    pending = []
+    for news in group:
+        clean_text = await use_cached_summary(news, cached[news.url]) if cached.get(news.url) else None
+        if clean_text is not None:
+            texts[news.url] = clean_text
+        else:
+            # Нет в кэше или текст отклонён — через предзагрузку, пакет и параллельные повторы
+            pending.append(news)
 
-                logger.info(f"🚀 Отправляем в Telegram: {news.title[:60]}...")
+    articles = await prefetch_articles([news.url for news in pending]) if pending else {}
 
-                try:
-                    # --- универсальная отправка ---
-                    send_kwargs = dict(
-                        chat_id=CHAT_ID,
-                        text=clean_text,
-                        parse_mode="MarkdownV2",
-                        disable_web_page_preview=True,
-                    )
+    if len(pending) > 1:
+        async with slots:
+            logger.info(f"🧠 Пакетный анализ {len(pending)} новостей")
+            replies = await generate_gigachat_batch([news.url for news in pending], articles)
+        for news in pending:
+            if news.url not in replies:
+                continue
+            try:
+                texts[news.url] = await accept_summary(news, replies[news.url])
+            except Exception as e:
+                logger.error(f"❌ Пакетный ответ не подошёл для {news.url}: {e}")
+
+    rest = [news for news in pending if news.url not in texts]
+    results = await asyncio.gather(
+        *(summarize_news(news, slots, article_text=articles.get(news.url)) for news in rest)
+    )
+    texts.update((news.url, text) for news, text in zip(rest, results))
+    return texts
+
+
+async def send_to_target(chat_id, topic_id, clean_text, bulk=False):
+    """
+    Отправляет текст в один чат/топик через планировщик лимитов Telegram.
+    bulk=True — рассылка подписчикам: уступает общий лимит публикации.
+    """
+    # --- универсальная отправка ---
+    send_kwargs = dict(
+        chat_id=chat_id,
+        text=clean_text,
+        parse_mode="MarkdownV2",
+        disable_web_page_preview=True,
+    )
+
+    if topic_id:
+        send_kwargs["message_thread_id"] = topic_id
 
-                    if TOPIC_ID:
-                        send_kwargs["message_thread_id"] = TOPIC_ID
+    try:
+        await send_scheduler.send_message(get_bot(), bulk=bulk, **send_kwargs)
+    except TelegramBadRequest as parse_err:
+        logger.error(f"💥 Ошибка форматирования Markdown: {parse_err}, пробуем без parse_mode.")
+        send_kwargs.pop("parse_mode", None)
+        await send_scheduler.send_message(get_bot(), bulk=bulk, **send_kwargs)
+
+
+def target_key(chat_id, topic_id):
+    return f"{chat_id}:{topic_id or ''}"
+
+
+async def publish_news(news, clean_text):
+    """
+    Отправляет готовый текст во все целевые чаты и сохраняет факт отправки.
+    Если часть чатов не приняла сообщение, принявшие запоминаются в очереди, а новость
+    возвращается на повтор только для остальных.
+    Возвращает False, если аренду новости уже забрал другой воркер или отправка была частичной.
+    """
+    already_delivered = await renew_lease(news)
+    if already_delivered is None:
+        logger.warning(f"🔒 Новость {news.url} обрабатывает другой воркер, пропускаем.")
+        PUBLISHED.inc(result="lease_lost")
+        return False
+
+    logger.info(f"🚀 Отправляем в Telegram: {news.title[:60]}...")
+
+    delivered = set(already_delivered)
+    last_error = None
+    for chat_id, topic_id in PUBLISH_TARGETS:
+        key = target_key(chat_id, topic_id)
+        if key in delivered:
+            continue
+        try:
+            await send_to_target(chat_id, topic_id, clean_text)
+            delivered.add(key)
+        except Exception as e:
+            last_error = e
+            logger.error(f"❌ Не удалось отправить в чат {chat_id} (топик {topic_id}): {e}")
+
+    if last_error is not None:
+        if delivered == already_delivered:
+            raise last_error
+        # Часть целей получила новость: повтор уйдёт только в оставшиеся
+        PUBLISHED.inc(result="partial")
+        logger.warning(
+            f"⚠️ Новость {news.url} доставлена в {len(delivered)} из {len(PUBLISH_TARGETS)} целей, "
+            "остальные — на повторную попытку."
+        )
+        await fail_job(news, delivered)
+        return False
+
+    # ✅ сохраняем факт отправки и закрываем запись в очереди (рассылка остаётся за нами)
+    await complete_job(news, fanout=SUBSCRIBER_FANOUT)
+    PUBLISHED.inc(result="sent")
+
+    logger.info(f"✅ Новость опубликована: {news.url}")
+    if SUBSCRIBER_FANOUT:
+        start_fanout(news, clean_text)
+    return True
+
+
+def start_fanout(news, clean_text):
+    """Запускает рассылку подписчикам фоновой задачей."""
+    task = asyncio.create_task(fan_out_news(news, clean_text))
+    _fanout_tasks.add(task)
+    task.add_done_callback(_fanout_tasks.discard)
+
+
+def is_chat_gone(error):
+    """Чат больше недоступен боту: повторять отправку бессмысленно, подписку можно снять."""
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    return isinstance(error, TelegramBadRequest) and "chat not found" in str(error).lower()
+
+
+async def send_to_subscriber(chat_id, clean_text):
+    """
+    Отправляет текст подписчику, повторяя временные сбои (сеть, 5xx) с растущей паузой.
+    Возвращает "sent", "blocked" или "error".
+    """
+    delay = FANOUT_RETRY_DELAY
+    for attempt in range(1, FANOUT_SEND_RETRIES + 1):
+        try:
+            await send_to_target(chat_id, None, clean_text, bulk=True)
+            return "sent"
+        except Exception as e:
+            if is_chat_gone(e):
+                return "blocked"
+            # Ошибка в самом запросе повтором не исправится
+            if isinstance(e, TelegramBadRequest) or attempt == FANOUT_SEND_RETRIES:
+                logger.warning(f"📭 Не доставлено подписчику {chat_id}: {e}", extra=sampled("fanout_error"))
+                return "error"
+            await asyncio.sleep(delay)
+            delay *= 2
+
+
+async def fan_out_news(news, clean_text):
+    """
+    Рассылает уже готовый текст подписчикам: ни LLM, ни коммита на получателя —
+    одна отправка через общий планировщик лимитов и одна пачка доставок на FANOUT_BATCH_SIZE.
+    Заблокировавшие бота чаты отписываются. Рассылка идёт под арендой news_outbox:
+    если она прервётся или часть подписчиков не получит новость, её продолжит resume_fanouts.
+    """
+    target_chats = {chat_id for chat_id, _ in PUBLISH_TARGETS}
+    after_id = 0
+    total = 0
+    failed = 0
+    done = False
+    try:
+        while True:
+            if not await renew_fanout_lease(news):
+                logger.warning(f"🔒 Рассылку {news.url} продолжает другой воркер, останавливаемся.")
+                return
+            recipients = await pending_recipients(news.id, after_id, FANOUT_BATCH_SIZE)
+            if not recipients:
+                break
+            after_id = recipients[-1][0]
+
+            delivered, blocked = [], []
+            queue = iter(recipients)
+
+            async def worker():
+                nonlocal failed
+                for user_id, chat_id in queue:
+                    if chat_id in target_chats:
+                        # Чат уже получил новость как цель публикации
+                        delivered.append(user_id)
+                        continue
+                    result = await send_to_subscriber(chat_id, clean_text)
+                    if result == "sent":
+                        delivered.append(user_id)
+                    elif result == "blocked":
+                        blocked.append(chat_id)
+                    else:
+                        failed += 1
+                        FANOUT_DELIVERIES.inc(result="error")
+
+            await asyncio.gather(*(worker() for _ in range(min(FANOUT_CONCURRENCY, len(recipients)))))
+            await record_deliveries(news.id, delivered)
+            if blocked:
+                await unsubscribe(blocked)
+
+            FANOUT_DELIVERIES.inc(len(delivered), result="sent")
+            FANOUT_DELIVERIES.inc(len(blocked), result="blocked")
+            total += len(delivered)
+        # Недоставленные остаются без SentNews — следующий проход resume_fanouts попробует их снова
+        done = failed == 0
+    except Exception as e:
+        logger.error(f"💥 Рассылка подписчикам прервана для {news.url}: {e}")
 
-                    await bot.send_message(**send_kwargs)
+    try:
+        await finish_fanout(news, done)
+    except Exception as e:
+        # Аренда истечёт сама, и рассылку продолжат позже
+        logger.error(f"💥 Не удалось закрыть рассылку {news.url}: {e}")
+
+    if total:
+        logger.info(f"📨 Новость {news.url} разослана {total} подписчикам")
+    if failed:
+        logger.warning(f"📭 {failed} подписчиков не получили {news.url}, рассылка будет продолжена")
+
+
+async def resume_fanouts():
+    """
+    Продолжает рассылки, прерванные рестартом или сбоями отправки: получатели берутся
+    из pending_recipients, поэтому уже получившие новость повторно её не увидят.
+    """
+    if not SUBSCRIBER_FANOUT:
+        return 0
+    news_list = await claim_fanouts()
+    if not news_list:
+        return 0
+    cached = await get_cached_summaries({news.url for news in news_list})
+    resumed = 0
+    for news in news_list:
+        try:
+            if news.url not in cached:
+                raise ValueError("текста нет в кэше")
+            clean_text = validate_summary(cached[news.url])
+        except ValueError as e:
+            # Опубликованного текста больше нет — пересказывать заново ради рассылки не стоит
+            logger.warning(f"📭 Рассылка {news.url} закрыта без продолжения: {e}")
+            await finish_fanout(news, True)
+            continue
+        start_fanout(news, clean_text)
+        resumed += 1
+    logger.info(f"📨 Продолжаем {resumed} прерванных рассылок подписчикам")
+    return resumed
+
+
+async def wait_fanouts(timeout=None):
+    """
+    Дожидается фоновых рассылок при остановке бота; по истечении timeout они отменяются.
+    Отменённые рассылки продолжит resume_fanouts, когда истечёт их аренда.
+    """
+    if not _fanout_tasks:
+        return
+    try:
+        await asyncio.wait_for(asyncio.gather(*list(_fanout_tasks), return_exceptions=True), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"📭 Рассылки подписчикам не завершились за {timeout} с и прерваны")
+
+
+async def process_batch(news_list, cached, backlog_depth=0):
+    """Параллельно готовит тексты и публикует их строго в порядке очереди."""
+    # При глубокой очереди статьи уходят в LLM пакетами — меньше запросов на ту же очередь
+    batch_size = batch_size_for(max(backlog_depth, len(news_list)), SUMMARY_WORKERS)
+
+    # LLM-воркеры работают параллельно, но не дальше окна упреждения от публикации
+    slots = asyncio.Semaphore(SUMMARY_WORKERS)
+    window = deque()
+    backlog = iter(news_list)
+
+    def fill_window():
+        while len(window) < SUMMARY_WORKERS * SUMMARY_PREFETCH_FACTOR * batch_size:
+            group = list(islice(backlog, batch_size))
+            if not group:
+                return
+            task = asyncio.create_task(summarize_group(group, slots, cached))
+            window.extend((news, task) for news in group)
+
+    fill_window()
+    try:
+        # Публикация идёт строго в порядке очереди, темп задаёт планировщик лимитов Telegram
+        while window:
+            news, task = window.popleft()
+            clean_text = (await task).get(news.url)
+            fill_window()
+
+            if clean_text is None:
+                logger.warning(f"⚠️ Новость {news.url} останется на повторную попытку.")
+                PUBLISHED.inc(result="summary_failed")
+                await fail_job(news)
+                continue
 
-                except Exception as parse_err:
-                    logger.error(f"💥 Ошибка форматирования Markdown: {parse_err}, пробуем без parse_mode.")
-                    send_kwargs.pop("parse_mode", None)
-                    await bot.send_message(**send_kwargs)
+            try:
+                await publish_news(news, clean_text)
+            except Exception as e:
+                logger.error(f"❌ Не удалось опубликовать {news.url}: {e}")
+                logger.warning(f"⚠️ Новость {news.url} останется на повторную попытку.")
+                PUBLISHED.inc(result="send_failed")
+                await fail_job(news)
+                continue
+    finally:
+        for _, task in window:
+            task.cancel()
 
-                # ✅ сохраняем факт отправки
-                async with AsyncSessionLocal() as session:
-                    sent = SentNews(user_id=None, news_id=news.id, sent_at=datetime.utcnow())
-                    session.add(sent)
-                    await session.commit()
 
-                logger.info(f"✅ Новость опубликована: {news.url}")
-                success = True
-                break
+# === Основная логика ===
+async def send_new_news(snapshot=None):
+    """Обрабатывает и публикует новые новости. RSS здесь не скачивается — это делает этап приёма."""
+    if snapshot is not None:
+        logger.info(f"📦 Снимок приёма: {len(snapshot.items)} записей, новых {len(snapshot.inserted_ids)}")
 
-            except Exception as e:
-                logger.error(f"❌ Попытка {attempt} не удалась для {news.url}: {e}")
-                if attempt < MAX_RETRIES:
-                    logger.info(f"⏳ Повтор через {RETRY_DELAY} сек...")
-                    await asyncio.sleep(RETRY_DELAY)
-                else:
-                    logger.error(f"💀 Все попытки исчерпаны для {news.url}")
-
-        if not success:
-            logger.warning(f"⚠️ Новость {news.url} останется на повторную попытку.")
-        else:
-            await asyncio.sleep(DELAY_BETWEEN_NEWS)
+    try:
+        await evict_summaries()
+    except Exception as e:
+        logger.warning(f"⚠️ Не удалось очистить кэш саммари: {e}")
+
+    await release_expired_leases()
+    backlog_depth = await pending_count()
+    OUTBOX_BACKLOG.set(backlog_depth)
+
+    # Каждый экземпляр бота забирает свои пачки: FOR UPDATE SKIP LOCKED исключает двойную отправку
+    after_id = 0
+    total = 0
+    while True:
+        batch = await claim_batch(after_id)
+        if not batch:
+            break
+        after_id = batch[-1][0]
+        news_list = [news for _, news in batch]
+        total += len(news_list)
+
+        logger.info(f"🌐 Из очереди взято {len(news_list)} новостей. Начинаем обработку ({SUMMARY_WORKERS} воркеров)...")
+
+        # Уже оплаченные тексты (например, после сбоя отправки) берём из кэша
+        try:
+            cached = await get_cached_summaries({news.url for news in news_list})
+        except Exception as e:
+            logger.warning(f"⚠️ Кэш саммари недоступен: {e}")
+            cached = {}
+
+        await process_batch(news_list, cached, backlog_depth)
+        backlog_depth = max(backlog_depth - len(news_list), 0)
+
+    if not total:
+        logger.info("😴 Нет новых новостей для публикации.")
+        return
 
-    logger.info("🏁 Цикл отправки завершён.")
+    logger.info(f"🏁 Цикл отправки завершён, обработано {total} новостей.")
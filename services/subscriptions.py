@@ -0,0 +1,78 @@
+# services/subscriptions.py
+"""
+Подписчики рассылки (/subscribe, /unsubscribe) и учёт доставок.
+
+Подписчик — любой чат (личный или группа), его id хранится в users.tg_id.
+Доставки пишутся в sent_news пачками одним INSERT ... ON CONFLICT DO NOTHING
+на unique_user_news, поэтому повторная рассылка той же новости никому не дублируется.
+"""
+from datetime import datetime
+from sqlalchemy import select, update, exists
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database.db import AsyncSessionLocal
+from database.models import User, SentNews
+
+
+async def subscribe(chat_id, username=None):
+    """Оформляет подписку чата. Возвращает False, если чат уже был подписан."""
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        was_subscribed = await session.scalar(
+            select(User.subscribed).where(User.tg_id == chat_id)
+        )
+        await session.execute(
+            pg_insert(User)
+            .values(tg_id=chat_id, username=username, subscribed=True, subscribed_at=now, created_at=now)
+            .on_conflict_do_update(
+                index_elements=["tg_id"],
+                set_={"subscribed": True, "subscribed_at": now, "username": username},
+            )
+        )
+        await session.commit()
+    return not was_subscribed
+
+
+async def unsubscribe(chat_ids):
+    """Отписывает чаты (по одному или списком). Возвращает количество отписанных."""
+    if isinstance(chat_ids, int):
+        chat_ids = [chat_ids]
+    if not chat_ids:
+        return 0
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            update(User)
+            .where(User.tg_id.in_(list(chat_ids)), User.subscribed.is_(True))
+            .values(subscribed=False)
+        )
+        await session.commit()
+    return result.rowcount
+
+
+async def pending_recipients(news_id, after_id, limit):
+    """
+    Следующая пачка подписчиков (id, tg_id), которым новость ещё не доставлена.
+    Выборка по ключу id, поэтому прерванную рассылку можно продолжить тем же вызовом.
+    """
+    async with AsyncSessionLocal() as session:
+        delivered = exists().where(SentNews.user_id == User.id, SentNews.news_id == news_id)
+        result = await session.execute(
+            select(User.id, User.tg_id)
+            .where(User.subscribed.is_(True), User.id > after_id, ~delivered)
+            .order_by(User.id)
+            .limit(limit)
+        )
+        return result.all()
+
+
+async def record_deliveries(news_id, user_ids):
+    """Записывает доставки одной пачкой без отдельного коммита на каждого получателя."""
+    if not user_ids:
+        return
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            pg_insert(SentNews)
+            .values([{"user_id": user_id, "news_id": news_id, "sent_at": now} for user_id in user_ids])
+            .on_conflict_do_nothing(constraint="unique_user_news")
+        )
+        await session.commit()
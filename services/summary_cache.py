@@ -0,0 +1,74 @@
+# services/summary_cache.py
+import os
+import hashlib
+from datetime import datetime, timedelta
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from database.db import AsyncSessionLocal
+from database.models import SummaryCache
+from services.gigachat import PROMPT_TEMPLATE
+from logger.logger import logger
+
+# === Конфигурация ===
+SUMMARY_CACHE_TTL_DAYS = int(os.getenv("SUMMARY_CACHE_TTL_DAYS", 14))   # сколько хранить тексты
+SUMMARY_CACHE_MAX_ROWS = int(os.getenv("SUMMARY_CACHE_MAX_ROWS", 5000))  # максимум записей
+
+# Версия промта: меняется вместе с PROMPT_TEMPLATE
+PROMPT_HASH = hashlib.sha256(PROMPT_TEMPLATE.encode("utf-8")).hexdigest()[:16]
+
+
+async def get_cached_summaries(urls):
+    """Возвращает {url: текст} для уже сгенерированных новостей одним запросом."""
+    if not urls:
+        return {}
+    async with AsyncSessionLocal() as session:
+        result = await session.execute(
+            select(SummaryCache.url, SummaryCache.summary).where(
+                SummaryCache.prompt_hash == PROMPT_HASH,
+                SummaryCache.url.in_(list(urls)),
+            )
+        )
+        return {url: summary for url, summary in result}
+
+
+async def store_summary(url, summary):
+    """Сохраняет готовый ответ LLM, чтобы не платить за ту же новость повторно."""
+    stmt = pg_insert(SummaryCache).values(
+        url=url, prompt_hash=PROMPT_HASH, summary=summary, created_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="unique_summary_url_prompt",
+        set_={"summary": stmt.excluded.summary, "created_at": stmt.excluded.created_at},
+    )
+    async with AsyncSessionLocal() as session:
+        await session.execute(stmt)
+        await session.commit()
+
+
+async def drop_summary(url):
+    """Удаляет текст новости для текущей версии промта (например, если он не прошёл проверку)."""
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            delete(SummaryCache).where(SummaryCache.url == url, SummaryCache.prompt_hash == PROMPT_HASH)
+        )
+        await session.commit()
+
+
+async def evict_summaries():
+    """Удаляет устаревшие записи и всё, что не помещается в лимит по количеству."""
+    border = datetime.utcnow() - timedelta(days=SUMMARY_CACHE_TTL_DAYS)
+    async with AsyncSessionLocal() as session:
+        by_age = await session.execute(delete(SummaryCache).where(SummaryCache.created_at < border))
+
+        overflow = (
+            select(SummaryCache.id)
+            .order_by(SummaryCache.created_at.desc())
+            .offset(SUMMARY_CACHE_MAX_ROWS)
+        )
+        by_size = await session.execute(delete(SummaryCache).where(SummaryCache.id.in_(overflow)))
+        await session.commit()
+
+    removed = by_age.rowcount + by_size.rowcount
+    if removed:
+        logger.info(f"🧹 Кэш саммари: удалено {removed} записей")
+    return removed
@@ -0,0 +1,14 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# Окружение для импорта модулей бота; к БД и Telegram тесты не обращаются
+os.environ.setdefault("TOKEN", "123456:test")
+os.environ.setdefault("CHAT_ID", "1000")
+os.environ.setdefault("POSTGRES_USER", "postgres")
+os.environ.setdefault("POSTGRES_PASSWORD", "postgres")
+os.environ.setdefault("POSTGRES_DB", "gamecom_test")
+os.environ.setdefault("POSTGRES_HOST", "localhost")
+os.environ.setdefault("POSTGRES_PORT", "5432")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOG_DIR", tempfile.mkdtemp(prefix="gamecom-test-logs-"))
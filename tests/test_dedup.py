@@ -0,0 +1,44 @@
+# tests/test_dedup.py
+import pytest
+from services.dedup import NearDuplicateIndex, jaccard, title_tokens
+
+DIFFERENT_STORIES = [
+    ("Вышел трейлер игры Hollow Knight", "Вышел трейлер игры Silksong"),
+    ("Sony анонсировала новую PlayStation", "Sony анонсировала новую игру"),
+    ("Valve выпустила патч для Counter-Strike 2", "Valve выпустила патч для Dota 2"),
+]
+
+SAME_STORIES = [
+    ("Valve выпустила крупный патч для Counter-Strike 2", "Valve выпустила крупный патч для Counter Strike 2!"),
+    ("Nintendo перенесла релиз новой Zelda на 2026 год", "Nintendo перенесла релиз новой «Zelda» на 2026 год"),
+]
+
+
+@pytest.mark.parametrize("left, right", DIFFERENT_STORIES)
+def test_different_stories_are_not_duplicates(left, right):
+    index = NearDuplicateIndex()
+    assert index.check_and_add(1, left) is None
+    assert index.check_and_add(2, right) is None
+
+
+@pytest.mark.parametrize("left, right", SAME_STORIES)
+def test_reprints_are_duplicates(left, right):
+    assert jaccard(title_tokens(left), title_tokens(right)) > 0.8
+    index = NearDuplicateIndex()
+    assert index.check_and_add(1, left) is None
+    assert index.check_and_add(2, right) == 1
+
+
+def test_find_does_not_change_index():
+    index = NearDuplicateIndex()
+    title = "Valve выпустила крупный патч для Counter-Strike 2"
+    assert index.find(title) is None
+    assert index.find(title) is None
+    index.add(1, title)
+    assert index.find(title) == 1
+
+
+def test_short_titles_are_skipped():
+    index = NearDuplicateIndex()
+    assert index.check_and_add(1, "Новый патч") is None
+    assert index.check_and_add(2, "Новый патч") is None
@@ -0,0 +1,47 @@
+# tests/test_feed_poller.py
+import pytest
+from services.feed_poller import (
+    FeedPollState, POLL_DEFAULT_SECONDS, POLL_MIN_SECONDS, POLL_MAX_SECONDS,
+    POLL_SPEEDUP, POLL_BACKOFF, POLL_MAX_ERROR_STEPS, POLL_JITTER,
+)
+
+
+def test_new_entries_speed_up_polling():
+    state = FeedPollState("feed", now=0)
+    state.record("ok", 3, now=100)
+    assert state.interval == POLL_DEFAULT_SECONDS * POLL_SPEEDUP
+    # Дальше чем POLL_MIN_SECONDS не ускоряемся
+    for step in range(2, 10):
+        state.record("ok", 3, now=100 * step)
+    assert state.interval == POLL_MIN_SECONDS
+
+
+def test_quiet_feed_backs_off_up_to_max():
+    state = FeedPollState("feed", now=0)
+    state.record("not_modified", 0, now=100)
+    assert state.interval == POLL_DEFAULT_SECONDS * POLL_BACKOFF
+    for step in range(2, 20):
+        state.record("ok", 0, now=100 * step)
+    assert state.interval == POLL_MAX_SECONDS
+
+
+def test_errors_back_off_exponentially_and_reset_on_success():
+    state = FeedPollState("feed", now=0)
+    state.record("error", 0, now=10)
+    assert state.errors == 1
+    assert state.interval == min(POLL_MAX_SECONDS, POLL_DEFAULT_SECONDS * 2)
+    for step in range(POLL_MAX_ERROR_STEPS + 3):
+        state.record("error", 0, now=20 + step)
+    assert state.errors == POLL_MAX_ERROR_STEPS + 4
+    assert state.interval == min(POLL_MAX_SECONDS, POLL_DEFAULT_SECONDS * 2 ** POLL_MAX_ERROR_STEPS)
+
+    state.record("ok", 1, now=100)
+    assert state.errors == 0
+
+
+@pytest.mark.parametrize("status, new_count", [("ok", 2), ("ok", 0), ("error", 0)])
+def test_next_poll_is_interval_with_jitter(status, new_count):
+    state = FeedPollState("feed", now=0)
+    state.record(status, new_count, now=1000)
+    delay = state.next_poll_at - 1000
+    assert state.interval * (1 - POLL_JITTER) <= delay <= state.interval * (1 + POLL_JITTER)
@@ -0,0 +1,40 @@
+# tests/test_gigachat.py
+from services.gigachat import parse_batch_reply, MIN_PART_LENGTH
+
+URLS = ["https://example.com/news/1", "https://example.com/news/12"]
+
+
+def part(number, text):
+    return f"<<<НОВОСТЬ {number}>>>\n{text}\n<<<КОНЕЦ {number}>>>"
+
+
+def note(url):
+    return "Заметка о новости, достаточно длинная для публикации в канале. " * 2 + f"Источник: {url}"
+
+
+def test_parts_are_matched_by_number():
+    reply = part(2, note(URLS[1])) + "\n" + part(1, note(URLS[0]))
+    assert parse_batch_reply(reply, URLS) == {URLS[0]: note(URLS[0]), URLS[1]: note(URLS[1])}
+
+
+def test_unknown_and_repeated_numbers_are_ignored():
+    reply = part(3, note(URLS[0])) + part(1, note(URLS[0])) + part(1, note(URLS[0]) + " (повтор)")
+    assert parse_batch_reply(reply, URLS) == {URLS[0]: note(URLS[0])}
+
+
+def test_url_prefix_does_not_match_longer_url():
+    # Часть 1 ссылается на .../news/12 — это чужая статья, а не .../news/1
+    reply = part(1, note(URLS[1])) + part(2, note(URLS[1]))
+    assert parse_batch_reply(reply, URLS) == {URLS[1]: note(URLS[1])}
+
+
+def test_url_with_trailing_slash_or_punctuation_matches():
+    reply = part(1, note(URLS[0] + "/")) + part(2, note(URLS[1]) + ".")
+    assert set(parse_batch_reply(reply, URLS)) == set(URLS)
+
+
+def test_short_and_stub_parts_are_rejected():
+    stub = "⚠️ Не удалось найти достоверную информацию по ссылке. " * 2 + URLS[1]
+    short = f"Коротко: {URLS[0]}"
+    assert len(short) < MIN_PART_LENGTH
+    assert parse_batch_reply(part(1, short) + part(2, stub), URLS) == {}
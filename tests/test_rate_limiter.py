@@ -0,0 +1,32 @@
+# tests/test_rate_limiter.py
+import time
+import asyncio
+from services.rate_limiter import TokenBucket
+
+
+def test_pause_blocks_then_allows_one_send():
+    async def scenario():
+        bucket = TokenBucket(rate=1, capacity=5)
+        bucket.pause(0.2)
+        assert not bucket.is_idle(time.monotonic())
+
+        started = time.monotonic()
+        await bucket.acquire()
+        first = time.monotonic() - started
+        await bucket.acquire()
+        second = time.monotonic() - started
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    # Первая отправка — сразу после паузы, вторая — уже в обычном темпе (1 в секунду)
+    assert 0.18 <= first < 0.5
+    assert second - first >= 0.9
+
+
+def test_pause_never_shortens_existing_block():
+    bucket = TokenBucket(rate=1, capacity=5)
+    bucket.pause(10)
+    blocked_until = bucket.blocked_until
+    bucket.pause(1)
+    assert bucket.blocked_until == blocked_until
+    assert bucket.tokens == 1
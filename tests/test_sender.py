@@ -0,0 +1,18 @@
+# tests/test_sender.py
+import pytest
+from services.sender import parse_targets
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("-100123:45,-100678", [(-100123, 45), (-100678, None)]),
+    (" -100123 , , -100678:7 ", [(-100123, None), (-100678, 7)]),
+    ("", []),
+    (None, []),
+])
+def test_parse_targets(value, expected):
+    assert parse_targets(value) == expected
+
+
+def test_parse_targets_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_targets("-100123:topic")